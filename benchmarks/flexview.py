@@ -0,0 +1,220 @@
+"""Benchmarks for the FlexView layout engine.
+
+Runs headless on the offscreen platform:
+
+    python -m benchmarks.flexview --sizes 1000 10000 100000 --nested
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+
+try:
+    import resource
+except ImportError:
+    # not available on windows
+    resource = None
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from qtpy import QtCore, QtGui, QtWidgets  # noqa: E402
+
+from qt_extensions.flexview import FlexView  # noqa: E402
+
+
+def build_model(count: int, nested: bool = False) -> QtGui.QStandardItemModel:
+    model = QtGui.QStandardItemModel()
+    root_item = model.invisibleRootItem()
+    # nested models group the items into folders of ten
+    group_size = 10 if nested else count
+    items = []
+    for i in range(count):
+        item = QtGui.QStandardItem(f'Item {i}')
+        size = QtCore.QSize(80 + i % 7 * 20, 60 + i % 5 * 10)
+        item.setData(size, QtCore.Qt.ItemDataRole.SizeHintRole)
+        items.append(item)
+        if len(items) == group_size:
+            if nested:
+                group_item = QtGui.QStandardItem(f'Group {i // group_size}')
+                group_item.appendRows(items)
+                root_item.appendRow(group_item)
+            else:
+                root_item.appendRows(items)
+            items = []
+    if items:
+        root_item.appendRows(items)
+    return model
+
+
+def max_rss() -> float:
+    # the peak resident set size of the process in KiB, unlike tracemalloc this
+    # includes the memory allocated by Qt
+    if resource is None:
+        return float('nan')
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        # bytes on macos
+        rss /= 1024
+    return rss
+
+
+def measure(
+    name: str, function: Callable[[], object], repeat: int
+) -> dict[str, float | str]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    # measure the python heap separately as tracing slows down the operation
+    tracemalloc.start()
+    function()
+    heap = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    times.sort()
+    return {
+        'operation': name,
+        'mean': statistics.mean(times) * 1000,
+        'median': statistics.median(times) * 1000,
+        'max': times[-1] * 1000,
+        'heap': heap / 1024,
+        'rss': max_rss() / 1024,
+    }
+
+
+def benchmark(
+    count: int, nested: bool, uniform: bool, cached: bool, repeat: int
+) -> list[dict[str, float | str]]:
+    app = QtWidgets.QApplication.instance()
+    results = []
+    model = None
+
+    def create_model() -> None:
+        nonlocal model
+        model = build_model(count, nested)
+
+    results.append(measure('build model', create_model, 1))
+
+    view = FlexView()
+    view.uniform_item_sizes = uniform
+    view.itemDelegate().cached_appearance = cached
+    view.default_size = QtCore.QSize(120, 90)
+    view.resize(1280, 720)
+    view.setModel(model)
+    view.show()
+    app.processEvents()
+
+    def layout() -> None:
+        view.reset()
+        view._layout()
+
+    def update_item_rects() -> None:
+        view.reset()
+        view._update_item_rects()
+
+    results.append(measure('layout (cold)', layout, repeat))
+    results.append(measure('_update_item_rects', update_item_rects, repeat))
+    results.append(measure('paintEvent', view.viewport().repaint, repeat))
+
+    random.seed(0)
+    viewport_rect = view.viewport().rect()
+    points = [
+        QtCore.QPoint(
+            random.randint(0, viewport_rect.width()),
+            random.randint(0, viewport_rect.height()),
+        )
+        for _ in range(repeat + 1)
+    ]
+    results.append(measure('indexAt', lambda: view.indexAt(points.pop()), repeat))
+
+    # rubber band sweeps across the viewport
+    flags = QtCore.QItemSelectionModel.SelectionFlag.ClearAndSelect
+    sweeps = [
+        QtCore.QRect(QtCore.QPoint(), viewport_rect.size() * ((i + 1) / (repeat + 1)))
+        for i in range(repeat + 1)
+    ]
+    results.append(
+        measure('setSelection', lambda: view.setSelection(sweeps.pop(), flags), repeat)
+    )
+
+    # resize reflows
+    sizes = [QtCore.QSize(640 + i * 37 % 1280, 720) for i in range(repeat + 1)]
+
+    def resize() -> None:
+        view.resize(sizes.pop())
+        app.processEvents()
+        view.viewport().repaint()
+
+    results.append(measure('resize', resize, repeat))
+
+    # scroll steps
+    scroll_bar = view.verticalScrollBar()
+    step = max(1, scroll_bar.maximum() // max(1, repeat))
+
+    def scroll() -> None:
+        scroll_bar.setValue(scroll_bar.value() + step)
+        view.viewport().repaint()
+
+    results.append(measure('scroll', scroll, repeat))
+
+    view.close()
+    view.deleteLater()
+    app.processEvents()
+    return results
+
+
+def report(title: str, results: list[dict[str, float | str]]) -> None:
+    print(title)
+    # the python heap is the peak of one run, the rss is the peak of the process
+    print(
+        f'{"operation":<20} {"mean ms":>10} {"median ms":>10} {"max ms":>10} '
+        f'{"py heap KiB":>12} {"max rss MiB":>12}'
+    )
+    for result in results:
+        print(
+            f'{result["operation"]:<20} {result["mean"]:>10.3f} '
+            f'{result["median"]:>10.3f} {result["max"]:>10.3f} '
+            f'{result["heap"]:>12.1f} {result["rss"]:>12.1f}'
+        )
+    print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument(
+        '--nested', action='store_true', help='group items with child_rows'
+    )
+    parser.add_argument(
+        '--variable', action='store_true', help='use sizeHint for item sizes'
+    )
+    parser.add_argument(
+        '--cached', action='store_true', help='use the cached delegate appearance'
+    )
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication([])  # noqa: F841
+    for count in args.sizes:
+        results = benchmark(
+            count, args.nested, not args.variable, args.cached, args.repeat
+        )
+        options = ['variable' if args.variable else 'uniform']
+        if args.nested:
+            options.append('nested')
+        if args.cached:
+            options.append('cached')
+        report(f'{count} items ({", ".join(options)})', results)
+
+
+if __name__ == '__main__':
+    main()
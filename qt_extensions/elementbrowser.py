@@ -2,7 +2,10 @@ from __future__ import annotations
 
 import copy
 import dataclasses
-from collections.abc import Sequence
+import heapq
+import operator
+import re
+from collections.abc import Iterable, Iterator, Sequence
 from typing import Any, Callable
 
 from qt_material_icons import MaterialIcon
@@ -10,6 +13,10 @@ from qtpy import QtCore, QtGui, QtWidgets
 
 from .helper import title
 
+_DISPLAY_ROLES = frozenset(
+    (QtCore.Qt.ItemDataRole.DisplayRole, QtCore.Qt.ItemDataRole.EditRole)
+)
+
 
 def set_flag(item: QtGui.QStandardItem, flag: QtCore.Qt.ItemFlag, value: bool) -> None:
     if value:
@@ -18,6 +25,26 @@ def set_flag(item: QtGui.QStandardItem, flag: QtCore.Qt.ItemFlag, value: bool) -
         item.setFlags(item.flags() and ~flag)
 
 
+def _discard(
+    lookup: dict[Any, dict[QtCore.QPersistentModelIndex, None]],
+    key: Any,
+    persistent: QtCore.QPersistentModelIndex,
+) -> None:
+    indexes = lookup.get(key)
+    if indexes is not None:
+        indexes.pop(persistent, None)
+        if not indexes:
+            del lookup[key]
+
+
+def _identity(element: Any) -> Any:
+    return element
+
+
+def _none(element: Any) -> None:
+    return None
+
+
 def check_flag(
     item: QtGui.QStandardItem | QtCore.QModelIndex, flag: QtCore.Qt.ItemFlag
 ) -> bool:
@@ -35,23 +62,473 @@ class Field:
             self.label = title(self.name)
 
 
-class ElementModel(QtGui.QStandardItemModel):
+@dataclasses.dataclass
+class FieldChange:
+    name: str
+    old_value: Any = None
+    new_value: Any = None
+
+
+class _ElementModelMixin:
+    # shared implementation of the ElementModel api for item model backends
+    fields: Sequence[Field]
+
+    # the previous element of element_changed is a shallow copy unless enabled
+    deepcopy_changes = False
+
+    def _init_elements(self, fields: Sequence[Field]) -> None:
+        # this is used to track elements about to be moved
+        self.selected_indexes = []
+
+        # lookup tables for find_indexes, elements are not necessarily hashable
+        # so they are tracked by id and by the values of their fields
+        self._element_indexes: dict[int, dict[QtCore.QPersistentModelIndex, None]] = {}
+        self._field_indexes: list[
+            tuple[Field, dict[Any, dict[QtCore.QPersistentModelIndex, None]] | None]
+        ] = []
+        self._indexed_elements: dict[
+            QtCore.QPersistentModelIndex, tuple[Any, list[Any]]
+        ] = {}
+
+        # field accessors compiled per element type
+        self._getter_fields: Sequence[Field] | None = None
+        self._field_columns: dict[int, int] = {}
+        self._element_getters: dict[type, tuple[Callable[[Any], Any], ...]] = {}
+
+        if not fields:
+            fields = (Field('name'),)
+        self.fields = fields
+
+        # indexes whose children are appended on request through fetch_requested
+        self._fetchable_indexes: dict[QtCore.QPersistentModelIndex, None] = {}
+
+        self.rowsInserted.connect(self._rows_inserted)
+        self.rowsAboutToBeRemoved.connect(self._rows_about_to_be_removed)
+        self.dataChanged.connect(self._data_changed)
+        self.modelReset.connect(self._reset_lookup)
+
+    def canFetchMore(self, parent: QtCore.QModelIndex) -> bool:
+        if not self._fetchable_indexes or not parent.isValid():
+            return False
+        persistent_index = QtCore.QPersistentModelIndex(parent.siblingAtColumn(0))
+        return persistent_index in self._fetchable_indexes
+
+    def fetchMore(self, parent: QtCore.QModelIndex) -> None:
+        parent = parent.siblingAtColumn(0)
+        persistent_index = QtCore.QPersistentModelIndex(parent)
+        if self._fetchable_indexes.pop(persistent_index, False) is None:
+            self.fetch_requested.emit(parent)
+
+    def hasChildren(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> bool:
+        # fetchable indexes need to be expandable before their rows exist
+        return self.canFetchMore(parent) or super().hasChildren(parent)
+
+    def duplicate_index(self, index: QtCore.QModelIndex) -> QtCore.QModelIndex:
+        element = index.data(QtCore.Qt.UserRole)
+        copied_element = copy.deepcopy(element)
+        icon = index.data(QtCore.Qt.DecorationRole)
+        movable = check_flag(index, QtCore.Qt.ItemIsDragEnabled)
+        no_children = check_flag(index, QtCore.Qt.ItemNeverHasChildren)
+        parent = index.parent()
+        copied_index = self.append_element(
+            copied_element, icon, movable, no_children, parent
+        )
+        return copied_index
+
+    def element(self, index: QtCore.QModelIndex) -> Any:
+        data = self.data(index.siblingAtColumn(0), QtCore.Qt.UserRole)
+        return data
+
+    def elements(self, parent: QtCore.QModelIndex | None = None) -> tuple:
+        if parent is None:
+            parent = QtCore.QModelIndex()
+        elements = []
+        for row in range(self.rowCount(parent)):
+            index = self.index(row, 0, parent)
+            if not index.isValid():  # optimization
+                continue
+            data = index.data(QtCore.Qt.UserRole)
+            if data is not None:
+                elements.append(data)
+            elements.extend(self.elements(index))
+        return tuple(elements)
+
+    def find_indexes(
+        self,
+        value: Any,
+        field: Field | None = None,
+        parent: QtCore.QModelIndex | None = None,
+    ) -> tuple[QtCore.QModelIndex, ...]:
+        if parent is None or value is None:
+            parent = QtCore.QModelIndex()
+
+        persistent_indexes = self._lookup_indexes(value, field)
+        if persistent_indexes is None:
+            return self._find_indexes(value, field, parent)
+
+        indexes = []
+        for persistent_index in persistent_indexes:
+            index = self.index(persistent_index.row(), 0, persistent_index.parent())
+            if parent.isValid() and not self._is_descendant(index, parent):
+                continue
+            indexes.append(index)
+
+        # return indexes in the same order as the tree
+        indexes.sort(key=self._index_path)
+        return tuple(indexes)
+
+    def refresh_element(self, element: Any) -> None:
+        # update the DisplayRole based on the element stored in the first item
+        for index in self.find_indexes(element):
+            self.refresh_index(index)
+
+    def remove_indexes(self, indexes: Iterable[QtCore.QModelIndex]) -> None:
+        # group rows by parent so that consecutive rows are removed as one range
+        parent_rows: dict[QtCore.QPersistentModelIndex | None, set[int]] = {}
+        for index in indexes:
+            if not index.isValid():
+                continue
+            parent = index.parent()
+            key = QtCore.QPersistentModelIndex(parent) if parent.isValid() else None
+            parent_rows.setdefault(key, set()).add(index.row())
+
+        for key, rows in parent_rows.items():
+            if key is None:
+                parent = QtCore.QModelIndex()
+            elif key.isValid():
+                parent = key.sibling(key.row(), 0)
+            else:
+                # the parent was removed with one of the other ranges
+                continue
+
+            # remove ranges from the bottom so the remaining rows stay valid
+            rows = sorted(rows, reverse=True)
+            end = previous = rows[0]
+            for row in rows[1:] + [None]:
+                if row is not None and row == previous - 1:
+                    previous = row
+                    continue
+                for element_row in range(previous, end + 1):
+                    index = self.index(element_row, 0, parent)
+                    self.element_removed.emit(index.data(QtCore.Qt.UserRole))
+                self.removeRows(previous, end - previous + 1, parent)
+                end = previous = row
+
+    def set_fetchable(self, index: QtCore.QModelIndex, fetchable: bool = True) -> None:
+        persistent_index = QtCore.QPersistentModelIndex(index.siblingAtColumn(0))
+        if fetchable:
+            self._fetchable_indexes[persistent_index] = None
+        else:
+            self._fetchable_indexes.pop(persistent_index, None)
+
+    def widest_values(
+        self, field: Field, count: int, rows: int = 1
+    ) -> list[tuple[Any, tuple[QtCore.QModelIndex, ...]]]:
+        # the count values of the field with the longest display texts and the
+        # indexes of up to rows rows holding each value, values are read from
+        # the elements without creating an index for the field
+        texts: dict[str, tuple[Any, list[QtCore.QPersistentModelIndex]]] = {}
+        for persistent_index, (element, values) in self._indexed_elements.items():
+            value = self._value(element, field)
+            text = '' if value is None else str(value)
+            value_rows = texts.get(text)
+            if value_rows is None:
+                texts[text] = (value, [persistent_index])
+            elif len(value_rows[1]) < rows:
+                value_rows[1].append(persistent_index)
+
+        widest_values = []
+        for text in heapq.nlargest(count, texts, key=len):
+            value, persistent_indexes = texts[text]
+            indexes = tuple(
+                index.sibling(index.row(), 0) for index in persistent_indexes
+            )
+            widest_values.append((value, indexes))
+        return widest_values
+
+    def _change_element(
+        self, element: Any, value: Any, field: Field
+    ) -> tuple[Any, Any, FieldChange]:
+        # fields are replaced on the element so a shallow copy keeps the
+        # previous values without copying the whole object graph
+        if self.deepcopy_changes:
+            previous = copy.deepcopy(element)
+        else:
+            previous = copy.copy(element)
+        old_value = self._value(element, field)
+        element = self._set_value(element, value, field)
+        change = FieldChange(field.name, old_value, self._value(element, field))
+        return element, previous, change
+
+    def _compile_getter(self, element_type: type, field: Field) -> Callable[[Any], Any]:
+        if issubclass(element_type, (str, int, float)):
+            return _identity
+        elif issubclass(element_type, dict):
+            return operator.methodcaller('get', field.name)
+        elif issubclass(element_type, Sequence):
+            try:
+                return operator.itemgetter(self.fields.index(field))
+            except ValueError:
+                return _none
+        else:
+            return operator.attrgetter(field.name)
+
+    def _data_changed(
+        self,
+        top_left: QtCore.QModelIndex,
+        bottom_right: QtCore.QModelIndex,
+        roles: Sequence[int] = (),
+    ) -> None:
+        # only elements stored in the first column are tracked
+        if top_left.column() > 0:
+            return
+        if roles and QtCore.Qt.ItemDataRole.UserRole not in roles:
+            return
+        parent = top_left.parent()
+        if not roles:
+            # items replaced by drops bring their children without rowsInserted
+            self._reindex_rows(parent, top_left.row(), bottom_right.row())
+            return
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            self._reindex_element(self.index(row, 0, parent))
+
+    def _field_index(
+        self, field: Field
+    ) -> dict[Any, dict[QtCore.QPersistentModelIndex, None]] | None:
+        for indexed_field, value_indexes in self._field_indexes:
+            if indexed_field == field:
+                return value_indexes
+
+        # field indexes are created the first time a field is looked up
+        i = len(self._field_indexes)
+        self._field_indexes.append((field, {}))
+        for persistent_index, (element, values) in self._indexed_elements.items():
+            value = self._value(element, field)
+            values.append(value)
+            self._index_value(i, value, persistent_index)
+        return self._field_indexes[i][1]
+
+    def _find_indexes(
+        self, value: Any, field: Field | None, parent: QtCore.QModelIndex
+    ) -> tuple[QtCore.QModelIndex, ...]:
+        indexes = []
+        for row in range(self.rowCount(parent)):
+            index = self.index(row, 0, parent)
+            if not index.isValid():  # optimization
+                continue
+
+            data = index.data(QtCore.Qt.UserRole)
+            if field is None and value == data:
+                indexes.append(index)
+            elif value == self._value(data, field):
+                indexes.append(index)
+
+            indexes.extend(self._find_indexes(value, field, index))
+        return tuple(indexes)
+
+    def _getters(self, element_type: type) -> tuple[Callable[[Any], Any], ...]:
+        if self.fields is not self._getter_fields:
+            self._getter_fields = self.fields
+            self._field_columns = {
+                id(field): column for column, field in enumerate(self.fields)
+            }
+            self._element_getters = {}
+
+        try:
+            return self._element_getters[element_type]
+        except KeyError:
+            getters = tuple(
+                self._compile_getter(element_type, field) for field in self.fields
+            )
+            self._element_getters[element_type] = getters
+            return getters
+
+    def _index_element(self, index: QtCore.QModelIndex) -> None:
+        persistent_index = QtCore.QPersistentModelIndex(index)
+        element = index.data(QtCore.Qt.ItemDataRole.UserRole)
+        self._element_indexes.setdefault(id(element), {})[persistent_index] = None
+
+        values = []
+        for i, (field, value_indexes) in enumerate(self._field_indexes):
+            value = self._value(element, field)
+            values.append(value)
+            if value_indexes is not None:
+                self._index_value(i, value, persistent_index)
+        self._indexed_elements[persistent_index] = (element, values)
+
+    def _index_path(self, index: QtCore.QModelIndex) -> tuple[int, ...]:
+        path = []
+        while index.isValid():
+            path.append(index.row())
+            index = index.parent()
+        return tuple(reversed(path))
+
+    def _index_value(
+        self, i: int, value: Any, persistent_index: QtCore.QPersistentModelIndex
+    ) -> None:
+        field, value_indexes = self._field_indexes[i]
+        if value_indexes is None:
+            return
+        try:
+            value_indexes.setdefault(value, {})[persistent_index] = None
+        except TypeError:
+            # fields with unhashable values fall back to walking the tree
+            self._field_indexes[i] = (field, None)
+
+    @staticmethod
+    def _is_descendant(index: QtCore.QModelIndex, parent: QtCore.QModelIndex) -> bool:
+        index = index.parent()
+        while index.isValid():
+            if index == parent:
+                return True
+            index = index.parent()
+        return False
+
+    def _lookup_indexes(
+        self, value: Any, field: Field | None
+    ) -> list[QtCore.QPersistentModelIndex] | None:
+        if field is None:
+            # elements are matched by identity and by equality, equal elements
+            # share the value of the first field
+            persistent_indexes = dict(self._element_indexes.get(id(value), {}))
+            if not self.fields:
+                return None
+            value_indexes = self._field_index(self.fields[0])
+            if value_indexes is None:
+                return None
+            try:
+                candidates = value_indexes.get(self._value(value, self.fields[0]), {})
+            except TypeError:
+                return None
+            for persistent_index in candidates:
+                if persistent_index in persistent_indexes:
+                    continue
+                if self._indexed_elements[persistent_index][0] == value:
+                    persistent_indexes[persistent_index] = None
+        else:
+            value_indexes = self._field_index(field)
+            if value_indexes is None:
+                return None
+            try:
+                persistent_indexes = value_indexes.get(value, {})
+            except TypeError:
+                return None
+        return list(persistent_indexes)
+
+    def _reindex_element(self, index: QtCore.QModelIndex) -> None:
+        if index.isValid():
+            self._unindex_element(index)
+            self._index_element(index)
+
+    def _reindex_rows(self, parent: QtCore.QModelIndex, first: int, last: int) -> None:
+        for row in range(first, last + 1):
+            index = self.index(row, 0, parent)
+            self._reindex_element(index)
+            self._reindex_rows(index, 0, self.rowCount(index) - 1)
+
+    def _reset_lookup(self) -> None:
+        self._element_indexes.clear()
+        self._field_indexes.clear()
+        self._indexed_elements.clear()
+        self._fetchable_indexes.clear()
+
+    def _rows_about_to_be_removed(
+        self, parent: QtCore.QModelIndex, first: int, last: int
+    ) -> None:
+        for row in range(first, last + 1):
+            index = self.index(row, 0, parent)
+            self._rows_about_to_be_removed(index, 0, self.rowCount(index) - 1)
+            self._unindex_element(index)
+            if self._fetchable_indexes:
+                persistent_index = QtCore.QPersistentModelIndex(index)
+                self._fetchable_indexes.pop(persistent_index, None)
+
+    def _rows_inserted(self, parent: QtCore.QModelIndex, first: int, last: int) -> None:
+        for row in range(first, last + 1):
+            index = self.index(row, 0, parent)
+            self._index_element(index)
+            self._rows_inserted(index, 0, self.rowCount(index) - 1)
+
+    def _unindex_element(self, index: QtCore.QModelIndex) -> None:
+        persistent_index = QtCore.QPersistentModelIndex(index)
+        try:
+            element, values = self._indexed_elements.pop(persistent_index)
+        except KeyError:
+            return
+        _discard(self._element_indexes, id(element), persistent_index)
+        for (field, value_indexes), value in zip(self._field_indexes, values):
+            if value_indexes is not None:
+                _discard(value_indexes, value, persistent_index)
+
+    def _value(self, element: Any, field: Field) -> Any:
+        getters = self._element_getters.get(type(element))
+        if getters is None or self.fields is not self._getter_fields:
+            getters = self._getters(type(element))
+        column = self._field_columns.get(id(field))
+        try:
+            if column is None:
+                # fields that are not part of the model are not cached
+                return self._compile_getter(type(element), field)(element)
+            return getters[column](element)
+        except (AttributeError, KeyError):
+            return None
+
+    def _values(self, element: Any) -> list[Any]:
+        getters = self._element_getters.get(type(element))
+        if getters is None or self.fields is not self._getter_fields:
+            getters = self._getters(type(element))
+        try:
+            return [getter(element) for getter in getters]
+        except (AttributeError, KeyError):
+            pass
+
+        values = []
+        for getter in getters:
+            try:
+                values.append(getter(element))
+            except (AttributeError, KeyError):
+                values.append(None)
+        return values
+
+    def _set_value(self, element: Any, value: Any, field: Field) -> Any:
+        # the reason for returning element is in case element is an immutable object
+        if isinstance(element, (str, int, float)):
+            element = value
+        elif isinstance(element, dict):
+            element[field.name] = value
+        elif isinstance(element, Sequence):
+            if isinstance(element, tuple):
+                element = list(element)
+            self._getters(type(element))
+            try:
+                i = self._field_columns.get(id(field))
+                if i is None:
+                    i = self.fields.index(field)
+                element[i] = value
+            except (KeyError, ValueError):
+                pass
+        else:
+            try:
+                setattr(element, field.name, value)
+            except AttributeError:
+                pass
+        return element
+
+
+class ElementModel(_ElementModelMixin, QtGui.QStandardItemModel):
     element_added: QtCore.Signal = QtCore.Signal(object)
+    elements_added: QtCore.Signal = QtCore.Signal(tuple)
     element_changed: QtCore.Signal = QtCore.Signal(object, object)
+    field_changed: QtCore.Signal = QtCore.Signal(object, FieldChange)
     element_moved: QtCore.Signal = QtCore.Signal(object, QtCore.QModelIndex)
     element_removed: QtCore.Signal = QtCore.Signal(object)
+    fetch_requested: QtCore.Signal = QtCore.Signal(QtCore.QModelIndex)
 
     def __init__(
         self, fields: Sequence[Field] = (), parent: QtWidgets.QWidget | None = None
     ) -> None:
         super().__init__(parent)
-
-        # this is used to track elements about to be moved
-        self.selected_indexes = []
-
-        if not fields:
-            fields = (Field('name'),)
-        self.fields = fields
+        self._init_elements(fields)
         self.refresh_header()
 
     def clear(self) -> None:
@@ -93,16 +570,17 @@ class ElementModel(QtGui.QStandardItemModel):
         if result and role & roles:
             element_index = index.siblingAtColumn(0)
             if element_index.isValid():
-                element = index.data(QtCore.Qt.UserRole)
-                previous = copy.deepcopy(element)
+                element = element_index.data(QtCore.Qt.UserRole)
 
                 try:
                     field = self.fields[index.column()]
                 except KeyError:
                     return False
 
-                element = self._set_value(element, value, field)
+                element, previous, change = self._change_element(element, value, field)
+                self._reindex_element(element_index)
                 self.element_changed.emit(element, previous)
+                self.field_changed.emit(element, change)
         return result
 
     def append_element(
@@ -118,146 +596,448 @@ class ElementModel(QtGui.QStandardItemModel):
         if parent_item is None:
             parent_item = self.invisibleRootItem()
 
-        # create QStandardItems
-        items = []
-        for field in self.fields:
-            value = self._value(element, field)
-            item = QtGui.QStandardItem(value)
-            item.setEditable(field.editable and movable)
-            item.setDragEnabled(movable)
-            item.setDropEnabled(not no_children)
-            set_flag(item, QtCore.Qt.ItemNeverHasChildren, no_children)
-            items.append(item)
-
-        # update QStandardItems
+        items = self._create_items(element, icon, movable, no_children)
         if items:
-            item = items[0]
-            item.setData(element, QtCore.Qt.UserRole)
-            if icon:
-                item.setIcon(icon)
             parent_item.appendRow(items)
             self.element_added.emit(element)
-            return item.index()
+            return items[0].index()
         return QtCore.QModelIndex()
 
-    def duplicate_index(self, index: QtCore.QModelIndex) -> QtCore.QModelIndex:
-        element = index.data(QtCore.Qt.UserRole)
-        copied_element = copy.deepcopy(element)
-        icon = index.data(QtCore.Qt.DecorationRole)
-        movable = check_flag(index, QtCore.Qt.ItemIsDragEnabled)
-        no_children = check_flag(index, QtCore.Qt.ItemNeverHasChildren)
-        parent = index.parent()
-        copied_index = self.append_element(
-            copied_element, icon, movable, no_children, parent
-        )
-        return copied_index
-
-    def element(self, index: QtCore.QModelIndex) -> Any:
-        data = self.data(index.siblingAtColumn(0), QtCore.Qt.UserRole)
-        return data
-
-    def elements(self, parent: QtCore.QModelIndex | None = None) -> tuple:
-        if parent is None:
-            parent = QtCore.QModelIndex()
-        elements = []
-        for row in range(self.rowCount(parent)):
-            index = self.index(row, 0, parent)
-            if not index.isValid():  # optimization
-                continue
-            data = index.data(QtCore.Qt.UserRole)
-            if data is not None:
-                elements.append(data)
-            elements.extend(self.elements(index))
-        return tuple(elements)
-
-    def find_indexes(
+    def append_elements(
         self,
-        value: Any,
-        field: Field | None = None,
+        elements: Iterable,
+        icon: QtGui.QIcon | None = None,
+        movable: bool = True,
+        no_children: bool = False,
         parent: QtCore.QModelIndex | None = None,
     ) -> tuple[QtCore.QModelIndex, ...]:
-        indexes = []
+        parent_item = self.itemFromIndex(parent) if parent else None
+        if parent_item is None:
+            parent_item = self.invisibleRootItem()
 
-        if parent is None or value is None:
-            parent = QtCore.QModelIndex()
+        elements = tuple(elements)
+        if not elements or not self.fields:
+            return ()
 
-        for row in range(self.rowCount(parent)):
-            index = self.index(row, 0, parent)
-            if not index.isValid():  # optimization
-                continue
+        # build all rows before touching the model
+        rows = [
+            self._create_items(element, icon, movable, no_children)
+            for element in elements
+        ]
 
-            data = index.data(QtCore.Qt.UserRole)
-            if field is None and value == data:
-                indexes.append(index)
-            elif value == self._value(data, field):
-                indexes.append(index)
+        # multi column rows can only be appended one at a time, their signals
+        # are replaced by a single insertion of all rows
+        if parent_item.columnCount() < len(self.fields):
+            parent_item.setColumnCount(len(self.fields))
+        first = parent_item.rowCount()
+        self.beginInsertRows(parent_item.index(), first, first + len(rows) - 1)
+        blocked = self.blockSignals(True)
+        try:
+            for items in rows:
+                parent_item.appendRow(items)
+        finally:
+            self.blockSignals(blocked)
+            self.endInsertRows()
 
-            indexes.extend(self.find_indexes(value, field, index))
-        return tuple(indexes)
+        self.elements_added.emit(elements)
+        return tuple(items[0].index() for items in rows)
 
     def refresh_index(self, index: QtCore.QModelIndex) -> None:
         element = self.element(index)
-        for column, field in enumerate(self.fields):
+        for column, value in enumerate(self._values(element)):
             item_index = index.siblingAtColumn(column)
-            value = self._value(element, field)
             self.setData(item_index, value, QtCore.Qt.DisplayRole)
+        self._reindex_element(index.siblingAtColumn(0))
         # refresh child indexes
         # for row in range(self.rowCount(index)):
         #     self.refresh_index(self.index(row, 0, index))
 
-    def refresh_element(self, element: Any) -> None:
-        # update the DisplayRole based on the element stored in the first item
-        for index in self.find_indexes(element):
-            self.refresh_index(index)
-
     def refresh_header(self) -> None:
         labels = [field.label for field in self.fields]
         self.setHorizontalHeaderLabels(labels)
 
-    def _value(self, element: Any, field: Field) -> Any:
-        if isinstance(element, (str, int, float)):
-            value = element
-        elif isinstance(element, dict):
-            value = element.get(field.name)
-        elif isinstance(element, Sequence):
+    def _create_items(
+        self, element: Any, icon: QtGui.QIcon | None, movable: bool, no_children: bool
+    ) -> list[QtGui.QStandardItem]:
+        items = []
+        for field, value in zip(self.fields, self._values(element)):
+            if value is None or isinstance(value, str):
+                item = QtGui.QStandardItem(value)
+            else:
+                # other values would be interpreted as the number of rows
+                item = QtGui.QStandardItem()
+                item.setData(value, QtCore.Qt.ItemDataRole.DisplayRole)
+            item.setEditable(field.editable and movable)
+            item.setDragEnabled(movable)
+            item.setDropEnabled(not no_children)
+            set_flag(item, QtCore.Qt.ItemNeverHasChildren, no_children)
+            items.append(item)
+
+        if items:
+            item = items[0]
+            item.setData(element, QtCore.Qt.UserRole)
+            if icon:
+                item.setIcon(icon)
+        return items
+
+
+class _ElementNode:
+    __slots__ = ('element', 'parent', 'children', 'row', 'flags', 'icon')
+
+    def __init__(
+        self,
+        element: Any = None,
+        parent: _ElementNode | None = None,
+        flags: QtCore.Qt.ItemFlag = QtCore.Qt.ItemFlag.NoItemFlags,
+        icon: QtGui.QIcon | None = None,
+    ) -> None:
+        self.element = element
+        self.parent = parent
+        self.children: list[_ElementNode] = []
+        self.row = 0
+        self.flags = flags
+        self.icon = icon
+
+    def clone(self, parent: _ElementNode | None, deep: bool = False) -> _ElementNode:
+        element = copy.deepcopy(self.element) if deep else self.element
+        node = _ElementNode(element, parent, self.flags, self.icon)
+        node.children = [child.clone(node, deep) for child in self.children]
+        for row, child in enumerate(node.children):
+            child.row = row
+        return node
+
+
+class CompactElementModel(_ElementModelMixin, QtCore.QAbstractItemModel):
+    # stores elements in a tree of nodes instead of a QStandardItem per field,
+    # display values are computed from the elements when requested
+    element_added: QtCore.Signal = QtCore.Signal(object)
+    elements_added: QtCore.Signal = QtCore.Signal(tuple)
+    element_changed: QtCore.Signal = QtCore.Signal(object, object)
+    field_changed: QtCore.Signal = QtCore.Signal(object, FieldChange)
+    element_moved: QtCore.Signal = QtCore.Signal(object, QtCore.QModelIndex)
+    element_removed: QtCore.Signal = QtCore.Signal(object)
+    fetch_requested: QtCore.Signal = QtCore.Signal(QtCore.QModelIndex)
+
+    mime_type = 'application/x-qt-extensions-elements'
+
+    def __init__(
+        self, fields: Sequence[Field] = (), parent: QtWidgets.QWidget | None = None
+    ) -> None:
+        super().__init__(parent)
+        self._root = _ElementNode(flags=QtCore.Qt.ItemFlag.ItemIsDropEnabled)
+        self._dragged_nodes: list[_ElementNode] = []
+        self._init_elements(fields)
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._root.children = []
+        self.endResetModel()
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return len(self.fields)
+
+    def data(
+        self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole
+    ) -> Any:
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role in _DISPLAY_ROLES:
+            return self._value(node.element, self.fields[index.column()])
+        elif index.column() > 0:
+            return None
+        elif role == QtCore.Qt.ItemDataRole.UserRole:
+            return node.element
+        elif role == QtCore.Qt.ItemDataRole.DecorationRole:
+            return node.icon
+        return None
+
+    def dropMimeData(
+        self,
+        data: QtCore.QMimeData,
+        action: QtCore.Qt.DropAction,
+        row: int,
+        column: int,
+        parent: QtCore.QModelIndex,
+    ) -> bool:
+        if not data.hasFormat(self.mime_type) or not self._dragged_nodes:
+            return False
+        if action not in (
+            QtCore.Qt.DropAction.MoveAction,
+            QtCore.Qt.DropAction.CopyAction,
+        ):
+            return False
+
+        # the view removes the dragged rows after a move
+        parent = parent.siblingAtColumn(0)
+        parent_node = self._node(parent)
+        if row < 0:
+            row = len(parent_node.children)
+        deep = action == QtCore.Qt.DropAction.CopyAction
+        nodes = [node.clone(parent_node, deep) for node in self._dragged_nodes]
+        self._insert_nodes(parent, row, nodes)
+
+        if action == QtCore.Qt.DropAction.MoveAction:
+            for index in self.selected_indexes:
+                element = index.data(QtCore.Qt.ItemDataRole.UserRole)
+                self.element_moved.emit(element, parent)
+            self.selected_indexes = []
+        return True
+
+    def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlag:
+        if not index.isValid():
+            return self._root.flags
+        node = index.internalPointer()
+        flags = node.flags
+        if (
+            self.fields[index.column()].editable
+            and flags & QtCore.Qt.ItemFlag.ItemIsDragEnabled
+        ):
+            flags |= QtCore.Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def headerData(
+        self,
+        section: int,
+        orientation: QtCore.Qt.Orientation,
+        role: int = QtCore.Qt.ItemDataRole.DisplayRole,
+    ) -> Any:
+        if (
+            orientation == QtCore.Qt.Orientation.Horizontal
+            and role == QtCore.Qt.ItemDataRole.DisplayRole
+            and 0 <= section < len(self.fields)
+        ):
+            return self.fields[section].label
+        return super().headerData(section, orientation, role)
+
+    def index(
+        self,
+        row: int,
+        column: int,
+        parent: QtCore.QModelIndex = QtCore.QModelIndex(),
+    ) -> QtCore.QModelIndex:
+        parent_node = self._node(parent)
+        if 0 <= row < len(parent_node.children) and 0 <= column < len(self.fields):
+            return self.createIndex(row, column, parent_node.children[row])
+        return QtCore.QModelIndex()
+
+    def mimeData(self, indexes: Sequence[QtCore.QModelIndex]) -> QtCore.QMimeData:
+        # elements can't be serialized, only the dragged nodes are tracked
+        nodes = {}
+        for index in indexes:
+            if index.isValid():
+                nodes[id(index.internalPointer())] = index.internalPointer()
+
+        # children of dragged nodes are moved with their parent
+        self._dragged_nodes = []
+        for node in nodes.values():
+            parent_node = node.parent
+            while parent_node is not None and id(parent_node) not in nodes:
+                parent_node = parent_node.parent
+            if parent_node is None:
+                self._dragged_nodes.append(node)
+        data = QtCore.QMimeData()
+        data.setData(self.mime_type, QtCore.QByteArray())
+        return data
+
+    def mimeTypes(self) -> list[str]:
+        return [self.mime_type]
+
+    def parent(self, index: QtCore.QModelIndex | None = None) -> Any:
+        if index is None:
+            return super().parent()
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        parent_node = index.internalPointer().parent
+        if parent_node is None or parent_node is self._root:
+            return QtCore.QModelIndex()
+        return self.createIndex(parent_node.row, 0, parent_node)
+
+    def removeRow(
+        self, row: int, parent: QtCore.QModelIndex = QtCore.QModelIndex()
+    ) -> bool:
+        index = self.index(row, 0, parent)
+        if index.isValid():
+            self.element_removed.emit(index.data(QtCore.Qt.ItemDataRole.UserRole))
+        return self.removeRows(row, 1, parent)
+
+    def removeRows(
+        self, row: int, count: int, parent: QtCore.QModelIndex = QtCore.QModelIndex()
+    ) -> bool:
+        parent_node = self._node(parent)
+        if count <= 0 or row < 0 or row + count > len(parent_node.children):
+            return False
+        self.beginRemoveRows(parent, row, row + count - 1)
+        for node in parent_node.children[row : row + count]:
+            node.parent = None
+        del parent_node.children[row : row + count]
+        self._update_rows(parent_node, row)
+        self.endRemoveRows()
+        return True
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        return len(self._node(parent).children)
+
+    def setData(
+        self,
+        index: QtCore.QModelIndex,
+        value: Any,
+        role: int = QtCore.Qt.ItemDataRole.EditRole,
+    ) -> bool:
+        if not index.isValid():
+            return False
+        node = index.internalPointer()
+        if role in _DISPLAY_ROLES:
             try:
-                i = self.fields.index(field)
-                value = element[i]
-            except (KeyError, ValueError):
-                value = None
+                field = self.fields[index.column()]
+            except IndexError:
+                return False
+            node.element, previous, change = self._change_element(
+                node.element, value, field
+            )
+            self.dataChanged.emit(index, index, [role])
+            self._reindex_element(index.siblingAtColumn(0))
+            self.element_changed.emit(node.element, previous)
+            self.field_changed.emit(node.element, change)
+        elif index.column() > 0:
+            return False
+        elif role == QtCore.Qt.ItemDataRole.UserRole:
+            node.element = value
+            self.dataChanged.emit(index, index, [role])
+        elif role == QtCore.Qt.ItemDataRole.DecorationRole:
+            node.icon = value
+            self.dataChanged.emit(index, index, [role])
         else:
-            try:
-                value = getattr(element, field.name)
-            except AttributeError:
-                value = None
-        return value
+            return False
+        return True
 
-    def _set_value(self, element: Any, value: Any, field: Field) -> Any:
-        # the reason for returning element is in case element is an immutable object
-        if isinstance(element, (str, int, float)):
-            element = value
-        elif isinstance(element, dict):
-            element[field.name] = value
-        elif isinstance(element, Sequence):
-            if isinstance(element, tuple):
-                element = list(element)
-            try:
-                i = self.fields.index(field)
-                element[i] = value
-            except (KeyError, ValueError):
-                pass
+    def supportedDropActions(self) -> QtCore.Qt.DropAction:
+        return QtCore.Qt.DropAction.CopyAction | QtCore.Qt.DropAction.MoveAction
+
+    def append_element(
+        self,
+        element: Any = None,
+        icon: QtGui.QIcon | None = None,
+        movable: bool = True,
+        no_children: bool = False,
+        parent: QtCore.QModelIndex | None = None,
+    ) -> QtCore.QModelIndex:
+        indexes = self._append_nodes((element,), icon, movable, no_children, parent)
+        if indexes:
+            self.element_added.emit(element)
+            return indexes[0]
+        return QtCore.QModelIndex()
+
+    def append_elements(
+        self,
+        elements: Iterable,
+        icon: QtGui.QIcon | None = None,
+        movable: bool = True,
+        no_children: bool = False,
+        parent: QtCore.QModelIndex | None = None,
+    ) -> tuple[QtCore.QModelIndex, ...]:
+        elements = tuple(elements)
+        indexes = self._append_nodes(elements, icon, movable, no_children, parent)
+        if indexes:
+            self.elements_added.emit(elements)
+        return indexes
+
+    def refresh_index(self, index: QtCore.QModelIndex) -> None:
+        # display values are computed on request, only views need to be updated
+        index = index.siblingAtColumn(0)
+        last_index = index.siblingAtColumn(len(self.fields) - 1)
+        self.dataChanged.emit(index, last_index, [QtCore.Qt.ItemDataRole.DisplayRole])
+        self._reindex_element(index)
+
+    def refresh_header(self) -> None:
+        if self.fields:
+            self.headerDataChanged.emit(
+                QtCore.Qt.Orientation.Horizontal, 0, len(self.fields) - 1
+            )
+
+    def _append_nodes(
+        self,
+        elements: Sequence,
+        icon: QtGui.QIcon | None,
+        movable: bool,
+        no_children: bool,
+        parent: QtCore.QModelIndex | None,
+    ) -> tuple[QtCore.QModelIndex, ...]:
+        if not elements or not self.fields:
+            return ()
+        if parent is None:
+            parent = QtCore.QModelIndex()
+        parent = parent.siblingAtColumn(0)
+        parent_node = self._node(parent)
+
+        flags = QtCore.Qt.ItemFlag.ItemIsSelectable | QtCore.Qt.ItemFlag.ItemIsEnabled
+        if movable:
+            flags |= QtCore.Qt.ItemFlag.ItemIsDragEnabled
+        if no_children:
+            flags |= QtCore.Qt.ItemFlag.ItemNeverHasChildren
         else:
-            try:
-                setattr(element, field.name, value)
-            except AttributeError:
-                pass
-        return element
+            flags |= QtCore.Qt.ItemFlag.ItemIsDropEnabled
+
+        nodes = [
+            _ElementNode(element, parent_node, flags, icon) for element in elements
+        ]
+        row = len(parent_node.children)
+        self._insert_nodes(parent, row, nodes)
+        return tuple(self.index(row + i, 0, parent) for i in range(len(nodes)))
+
+    def _insert_nodes(
+        self, parent: QtCore.QModelIndex, row: int, nodes: list[_ElementNode]
+    ) -> None:
+        parent_node = self._node(parent)
+        self.beginInsertRows(parent, row, row + len(nodes) - 1)
+        parent_node.children[row:row] = nodes
+        self._update_rows(parent_node, row)
+        self.endInsertRows()
+
+    def _node(self, index: QtCore.QModelIndex) -> _ElementNode:
+        if index.isValid():
+            return index.internalPointer()
+        return self._root
+
+    @staticmethod
+    def _update_rows(parent_node: _ElementNode, first: int) -> None:
+        children = parent_node.children
+        for row in range(first, len(children)):
+            children[row].row = row
+            children[row].parent = parent_node
 
 
 class ElementProxyModel(QtCore.QSortFilterProxyModel):
     # autoAcceptChildRows is a Qt6 feature
     _autoAcceptChildRows = False
 
+    def __init__(self, parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+
+        # the filter engine matches the filter text against a search text per
+        # source row, rows are stored per source parent and row number
+        self._filter_query: str | None = None
+        self._filter_pattern: re.Pattern | None = None
+        self._filter_matches: dict[QtCore.QModelIndex, set[int]] = {}
+        self._filter_rows: dict[QtCore.QModelIndex, set[int]] = {}
+        self._filter_branches: set[QtCore.QModelIndex] = set()
+        self._filter_match_parents: set[QtCore.QModelIndex] = set()
+        self._search_rows: dict[QtCore.QModelIndex, list[str]] | None = None
+        self._search_settings: tuple | None = None
+
+        # acceptance of source parents for autoAcceptChildRows, evaluated once
+        # per filter pass and cleared when the filter or the source changes
+        self._accepted_parents: dict[QtCore.QModelIndex, bool] = {}
+
+        # sort keys of source indexes, computed once per row when sorting
+        self._sort_keys: dict[QtCore.QModelIndex, tuple] = {}
+
+        # cached values of the rows after inserted or removed rows, taken
+        # before the source changes and stored again at the shifted rows
+        self._taken_rows: tuple[list, list] = ([], [])
+
     def autoAcceptChildRows(self) -> bool:  # noqa
         return self._autoAcceptChildRows
 
@@ -267,26 +1047,499 @@ class ElementProxyModel(QtCore.QSortFilterProxyModel):
     def filterAcceptsRow(
         self, source_row: int, source_parent: QtCore.QModelIndex
     ) -> bool:
+        if self._filter_query is not None:
+            return self._filter_accepts_row(source_row, source_parent)
         if super().filterAcceptsRow(source_row, source_parent):
             return True
         if self.autoAcceptChildRows() and source_parent.isValid():
-            source_row = source_parent.row()
-            source_parent = source_parent.parent()
-            return self.filterAcceptsRow(source_row, source_parent)
+            return self._parent_accepted(source_parent, self._parent_matches)
         return False
 
+    def invalidate(self) -> None:
+        self._clear_accepted_parents()
+        super().invalidate()
+
+    def invalidateFilter(self) -> None:
+        self._clear_accepted_parents()
+        super().invalidateFilter()
+
     def lessThan(
         self, source_left: QtCore.QModelIndex, source_right: QtCore.QModelIndex
     ) -> bool:
         # sort elements and groups separately
-        is_left_group = check_flag(source_left, QtCore.Qt.ItemNeverHasChildren)
-        is_right_group = check_flag(source_right, QtCore.Qt.ItemNeverHasChildren)
+        sort_keys = self._sort_keys
+        left_key = sort_keys.get(source_left)
+        if left_key is None:
+            left_key = sort_keys[source_left] = self._sort_key(source_left)
+        right_key = sort_keys.get(source_right)
+        if right_key is None:
+            right_key = sort_keys[source_right] = self._sort_key(source_right)
+
+        try:
+            return left_key < right_key
+        except TypeError:
+            # values that python can't compare are left to qt
+            is_left_group = left_key[0]
+            is_right_group = right_key[0]
+            if is_left_group == is_right_group:
+                return super().lessThan(source_left, source_right)
+            else:
+                return is_right_group
+
+    def setSourceModel(self, model: QtCore.QAbstractItemModel) -> None:
+        previous_model = self.sourceModel()
+        if previous_model is not None:
+            for signal, slot in self._source_signals(previous_model):
+                signal.disconnect(slot)
+
+        # connect before the proxy model so the search index is updated
+        # before rows are filtered
+        if model is not None:
+            for signal, slot in self._source_signals(model):
+                signal.connect(slot)
+        super().setSourceModel(model)
+        self._source_structure_changed()
+
+    def setFilterCaseSensitivity(self, sensitivity: QtCore.Qt.CaseSensitivity) -> None:
+        # the changed signals of the filter settings require Qt 5.15
+        self._clear_accepted_parents()
+        super().setFilterCaseSensitivity(sensitivity)
+
+    def setFilterFixedString(self, pattern: str) -> None:
+        self._clear_accepted_parents()
+        super().setFilterFixedString(pattern)
+
+    def setFilterKeyColumn(self, column: int) -> None:
+        self._clear_accepted_parents()
+        super().setFilterKeyColumn(column)
+
+    def setFilterRegularExpression(
+        self, regular_expression: QtCore.QRegularExpression | str
+    ) -> None:
+        self._clear_accepted_parents()
+        super().setFilterRegularExpression(regular_expression)
+
+    def setFilterRole(self, role: int) -> None:
+        self._clear_accepted_parents()
+        super().setFilterRole(role)
+
+    def setFilterWildcard(self, pattern: str) -> None:
+        self._clear_accepted_parents()
+        super().setFilterWildcard(pattern)
+
+    def setRecursiveFilteringEnabled(self, recursive: bool) -> None:
+        self._clear_accepted_parents()
+        super().setRecursiveFilteringEnabled(recursive)
+
+    def setSortCaseSensitivity(self, sensitivity: QtCore.Qt.CaseSensitivity) -> None:
+        # the changed signals of the sort settings require Qt 5.15
+        self._clear_sort_keys()
+        super().setSortCaseSensitivity(sensitivity)
+
+    def setSortRole(self, role: int) -> None:
+        self._clear_sort_keys()
+        super().setSortRole(role)
+
+    def filter_text(self) -> str:
+        return self._filter_query or ''
+
+    def matching_branches(self) -> tuple[QtCore.QModelIndex, ...]:
+        # source indexes of the rows that contain rows matching the filter text
+        if self._filter_query is not None and self._search_rows is None:
+            self._update_filter()
+        return tuple(self._filter_branches)
+
+    def set_filter_text(self, text: str) -> None:
+        if not text or self.sourceModel() is None:
+            self._filter_query = None
+            self._filter_pattern = None
+            self._filter_matches = {}
+            self._update_filter_rows()
+            self.invalidateFilter()
+            return
+
+        if self.filterCaseSensitivity() == QtCore.Qt.CaseSensitivity.CaseInsensitive:
+            query = text.casefold()
+        else:
+            query = text
+
+        previous_query = self._filter_query if self._filter_pattern is None else None
+        if '*' in query or '?' in query:
+            # wildcards don't match path separators, same as setFilterWildcard
+            pattern = re.escape(query).replace(r'\*', '[^/\n]*')
+            pattern = pattern.replace(r'\?', '[^/\n]')
+            self._filter_pattern = re.compile(pattern)
+        else:
+            self._filter_pattern = None
+        self._filter_query = query
+
+        if (
+            self._filter_pattern is None
+            and previous_query is not None
+            and previous_query in query
+            and self._search_rows is not None
+            and self._search_settings == self._current_search_settings()
+        ):
+            # only rows that matched the previous query can match
+            self._update_filter(self._filter_matches)
+        else:
+            self._update_filter()
+        self.invalidateFilter()
+
+    def _add_filter_matches(self, parent: QtCore.QModelIndex, rows: range) -> None:
+        matches = self._match_rows(self._search_rows[parent], rows)
+        if matches:
+            self._filter_matches.setdefault(parent, set()).update(matches)
+
+    def _clear_accepted_parents(self) -> None:
+        self._accepted_parents = {}
 
-        if is_left_group == is_right_group:
-            result = super().lessThan(source_left, source_right)
-            return result
+    def _clear_sort_keys(self) -> None:
+        self._sort_keys = {}
+
+    def _current_search_settings(self) -> tuple:
+        return (
+            self.filterKeyColumn(),
+            self.filterCaseSensitivity(),
+            self.filterRole(),
+        )
+
+    def _filter_accepts_row(
+        self, source_row: int, source_parent: QtCore.QModelIndex
+    ) -> bool:
+        if self._search_rows is None:
+            self._update_filter()
+        rows = self._filter_rows.get(source_parent)
+        if rows is not None and source_row in rows:
+            return True
+        if self.autoAcceptChildRows() and source_parent.isValid():
+            return self._parent_accepted(
+                source_parent, self._filter_match_parents.__contains__
+            )
+        return False
+
+    def _match_rows(self, texts: list[str], rows: Iterable[int]) -> set[int]:
+        if self._filter_pattern is not None:
+            search = self._filter_pattern.search
+            return {row for row in rows if search(texts[row])}
+        query = self._filter_query
+        return {row for row in rows if query in texts[row]}
+
+    def _parent_accepted(
+        self,
+        source_parent: QtCore.QModelIndex,
+        matches: Callable[[QtCore.QModelIndex], bool],
+    ) -> bool:
+        # walk up to the first ancestor with a known result, all parents on the
+        # way share the result
+        accepted_parents = self._accepted_parents
+        parents = []
+        accepted = False
+        index = source_parent
+        while index.isValid():
+            result = accepted_parents.get(index)
+            if result is not None:
+                accepted = result
+                break
+            parents.append(index)
+            if matches(index):
+                accepted = True
+                break
+            index = index.parent()
+
+        for parent in parents:
+            accepted_parents[parent] = accepted
+        return accepted
+
+    def _parent_matches(self, index: QtCore.QModelIndex) -> bool:
+        return super().filterAcceptsRow(index.row(), index.parent())
+
+    def _search_texts(
+        self,
+        model: QtCore.QAbstractItemModel,
+        parent: QtCore.QModelIndex,
+        rows: Iterable[int],
+    ) -> list[str]:
+        column = self.filterKeyColumn()
+        if column < 0:
+            columns = range(model.columnCount(parent))
         else:
-            return is_right_group
+            columns = (column,)
+        role = self.filterRole()
+        casefold = (
+            self.filterCaseSensitivity() == QtCore.Qt.CaseSensitivity.CaseInsensitive
+        )
+
+        texts = []
+        for row in rows:
+            values = []
+            for column in columns:
+                value = model.data(model.index(row, column, parent), role)
+                if value is not None:
+                    values.append(str(value))
+            text = '\n'.join(values)
+            texts.append(text.casefold() if casefold else text)
+        return texts
+
+    def _source_data_changed(
+        self,
+        top_left: QtCore.QModelIndex,
+        bottom_right: QtCore.QModelIndex,
+        roles: Sequence[int] = (),
+    ) -> None:
+        self._accepted_parents = {}
+        if self._sort_keys:
+            for row in range(top_left.row(), bottom_right.row() + 1):
+                for column in range(top_left.column(), bottom_right.column() + 1):
+                    self._sort_keys.pop(top_left.sibling(row, column), None)
+
+        if self._search_rows is None:
+            return
+        parent = top_left.parent()
+        texts = self._search_rows.get(parent)
+        if texts is None:
+            return
+
+        rows = range(top_left.row(), bottom_right.row() + 1)
+        texts[rows.start : rows.stop] = self._search_texts(
+            self.sourceModel(), parent, rows
+        )
+
+        if self._filter_query is not None:
+            matches = self._filter_matches.get(parent, set())
+            changed_matches = self._match_rows(texts, rows)
+            updated_matches = (matches - set(rows)) | changed_matches
+            if updated_matches != matches:
+                if updated_matches:
+                    self._filter_matches[parent] = updated_matches
+                else:
+                    self._filter_matches.pop(parent, None)
+                self._update_filter_rows()
+
+    def _sort_key(self, index: QtCore.QModelIndex) -> tuple:
+        is_group = check_flag(index, QtCore.Qt.ItemNeverHasChildren)
+        value = index.data(self.sortRole())
+        if (
+            isinstance(value, str)
+            and self.sortCaseSensitivity() == QtCore.Qt.CaseInsensitive
+        ):
+            value = value.casefold()
+        return is_group, value
+
+    def _source_rows_about_to_be_inserted(
+        self, parent: QtCore.QModelIndex, first: int, last: int
+    ) -> None:
+        self._take_rows(parent, first)
+
+    def _source_rows_about_to_be_removed(
+        self, parent: QtCore.QModelIndex, first: int, last: int
+    ) -> None:
+        # cached values of the removed rows and their children are dropped
+        model = self.sourceModel()
+        rows = range(first, last + 1)
+        if self._search_rows is None and not self._sort_keys:
+            rows = range(0)
+        for index in self._descendant_parents(model, parent, rows):
+            if self._search_rows is not None:
+                self._search_rows.pop(index, None)
+                self._filter_matches.pop(index, None)
+            if self._sort_keys:
+                for row in range(model.rowCount(index)):
+                    for column in range(model.columnCount(index)):
+                        self._sort_keys.pop(model.index(row, column, index), None)
+        self._take_rows(parent, first)
+
+    def _source_rows_inserted(
+        self, parent: QtCore.QModelIndex, first: int, last: int
+    ) -> None:
+        count = last - first + 1
+        self._restore_rows(parent, first, count)
+        if self._search_rows is None:
+            return
+
+        model = self.sourceModel()
+        rows = range(first, last + 1)
+        texts = self._search_rows.setdefault(parent, [])
+        texts[first:first] = self._search_texts(model, parent, rows)
+        matches = self._filter_matches.get(parent)
+        if matches:
+            matches = {row + count if row >= first else row for row in matches}
+            self._filter_matches[parent] = matches
+
+        # inserted rows can come with children of their own
+        parents = list(self._descendant_parents(model, parent, rows))
+        for index in parents:
+            self._search_rows[index] = self._search_texts(
+                model, index, range(model.rowCount(index))
+            )
+
+        if self._filter_query is not None:
+            self._add_filter_matches(parent, rows)
+            for index in parents:
+                self._add_filter_matches(index, range(model.rowCount(index)))
+            self._update_filter_rows()
+
+    def _source_rows_removed(
+        self, parent: QtCore.QModelIndex, first: int, last: int
+    ) -> None:
+        count = last - first + 1
+        self._restore_rows(parent, last + 1, -count)
+        if self._search_rows is None:
+            return
+
+        texts = self._search_rows.get(parent)
+        if texts is not None:
+            del texts[first : last + 1]
+            if not texts:
+                del self._search_rows[parent]
+        matches = self._filter_matches.pop(parent, None)
+        if matches:
+            matches = {
+                row - count if row > last else row
+                for row in matches
+                if not first <= row <= last
+            }
+            if matches:
+                self._filter_matches[parent] = matches
+        if self._filter_query is not None:
+            self._update_filter_rows()
+
+    def _source_structure_changed(self, *args) -> None:
+        # row numbers are no longer valid, the search index is rebuilt lazily
+        self._search_rows = None
+        self._accepted_parents = {}
+        self._sort_keys = {}
+
+    def _source_signals(self, model: QtCore.QAbstractItemModel) -> tuple:
+        return (
+            (model.dataChanged, self._source_data_changed),
+            (model.rowsAboutToBeInserted, self._source_rows_about_to_be_inserted),
+            (model.rowsInserted, self._source_rows_inserted),
+            (model.rowsAboutToBeRemoved, self._source_rows_about_to_be_removed),
+            (model.rowsRemoved, self._source_rows_removed),
+            (model.rowsMoved, self._source_structure_changed),
+            (model.layoutChanged, self._source_structure_changed),
+            (model.modelReset, self._source_structure_changed),
+        )
+
+    def _take_rows(self, parent: QtCore.QModelIndex, first: int) -> None:
+        # indexes of the rows after a change depend on the model and are only
+        # valid before the change, appended rows take nothing
+        self._accepted_parents = {}
+        model = self.sourceModel()
+        sort_keys = []
+        parent_rows = []
+        columns = range(model.columnCount(parent))
+        for row in range(first, model.rowCount(parent)):
+            if self._sort_keys:
+                for column in columns:
+                    index = model.index(row, column, parent)
+                    sort_key = self._sort_keys.pop(index, None)
+                    if sort_key is not None:
+                        sort_keys.append((row, column, sort_key))
+            if self._search_rows is not None:
+                index = model.index(row, 0, parent)
+                texts = self._search_rows.pop(index, None)
+                if texts is not None:
+                    matches = self._filter_matches.pop(index, None)
+                    parent_rows.append((row, texts, matches))
+        self._taken_rows = (sort_keys, parent_rows)
+
+    def _restore_rows(
+        self, parent: QtCore.QModelIndex, start: int, offset: int
+    ) -> None:
+        # rows before start were removed, the other rows moved by offset
+        model = self.sourceModel()
+        sort_keys, parent_rows = self._taken_rows
+        self._taken_rows = ([], [])
+        for row, column, sort_key in sort_keys:
+            if row >= start:
+                index = model.index(row + offset, column, parent)
+                self._sort_keys[index] = sort_key
+        if self._search_rows is None:
+            return
+        for row, texts, matches in parent_rows:
+            if row >= start:
+                index = model.index(row + offset, 0, parent)
+                self._search_rows[index] = texts
+                if matches is not None:
+                    self._filter_matches[index] = matches
+
+    def _update_filter(
+        self, candidates: dict[QtCore.QModelIndex, set[int]] | None = None
+    ) -> None:
+        if self._search_rows is None:
+            self._update_search_index()
+            candidates = None
+
+        matches = {}
+        if candidates is None:
+            for parent, texts in self._search_rows.items():
+                rows = self._match_rows(texts, range(len(texts)))
+                if rows:
+                    matches[parent] = rows
+        else:
+            for parent, rows in candidates.items():
+                rows = self._match_rows(self._search_rows[parent], rows)
+                if rows:
+                    matches[parent] = rows
+        self._filter_matches = matches
+        self._update_filter_rows()
+
+    def _update_filter_rows(self) -> None:
+        # accept the direct matches and the ancestors of matches
+        rows = {
+            parent: set(matches) for parent, matches in self._filter_matches.items()
+        }
+        branches = set()
+        for parent in self._filter_matches:
+            while parent.isValid() and parent not in branches:
+                branches.add(parent)
+                grandparent = parent.parent()
+                if self.isRecursiveFilteringEnabled():
+                    rows.setdefault(grandparent, set()).add(parent.row())
+                parent = grandparent
+        self._filter_rows = rows
+        self._filter_branches = branches
+        self._accepted_parents = {}
+
+        # matching rows that have children are required for autoAcceptChildRows
+        self._filter_match_parents = set()
+        if self._search_rows is not None:
+            for parent in self._search_rows:
+                if parent.isValid():
+                    matches = self._filter_matches.get(parent.parent())
+                    if matches and parent.row() in matches:
+                        self._filter_match_parents.add(parent)
+
+    def _update_search_index(self) -> None:
+        model = self.sourceModel()
+        self._search_settings = self._current_search_settings()
+        self._search_rows = {}
+        root = QtCore.QModelIndex()
+        count = model.rowCount(root)
+        if not count:
+            return
+        self._search_rows[root] = self._search_texts(model, root, range(count))
+        for parent in self._descendant_parents(model, root, range(count)):
+            self._search_rows[parent] = self._search_texts(
+                model, parent, range(model.rowCount(parent))
+            )
+
+    @staticmethod
+    def _descendant_parents(
+        model: QtCore.QAbstractItemModel,
+        parent: QtCore.QModelIndex,
+        rows: Iterable[int],
+    ) -> Iterator[QtCore.QModelIndex]:
+        # indexes with children in the subtrees of the rows
+        indexes = [model.index(row, 0, parent) for row in rows]
+        while indexes:
+            index = indexes.pop()
+            if model.hasChildren(index):
+                yield index
+                count = model.rowCount(index)
+                indexes.extend(model.index(row, 0, index) for row in range(count))
 
 
 class ElementDelegate(QtWidgets.QStyledItemDelegate):
@@ -312,11 +1565,19 @@ class ElementDelegate(QtWidgets.QStyledItemDelegate):
 class ElementTree(QtWidgets.QTreeView):
     selection_changed: QtCore.Signal = QtCore.Signal()
 
+    # number of longest values measured per column when resizing
+    resize_samples = 32
+    # number of rows per value searched for the deepest one when resizing, the
+    # indentation of the tree column depends on the depth
+    resize_depth_samples = 8
+
     def __init__(self, parent: QtWidgets.QWidget | None = None) -> None:
         super().__init__(parent)
 
         self.class_groups = True
-        self.selected_indexes = []
+        # selected rows of the view model, updated from the selection changes
+        self._selected_rows: dict[QtCore.QPersistentModelIndex, None] = {}
+        self._column_widths: dict[int, int] = {}
 
         self.setSelectionMode(
             QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection
@@ -333,7 +1594,7 @@ class ElementTree(QtWidgets.QTreeView):
             index = self.indexAt(event.pos())
             parent_element = index.data(QtCore.Qt.ItemDataRole.UserRole)
             if parent_element is not None:
-                for index in self.selected_indexes:
+                for index in self._selected_rows:
                     element = index.data(QtCore.Qt.ItemDataRole.UserRole)
                     if not isinstance(element, type(parent_element)):
                         event.ignore()
@@ -341,44 +1602,164 @@ class ElementTree(QtWidgets.QTreeView):
 
         super().dragMoveEvent(event)
 
+    def reset(self) -> None:
+        super().reset()
+        self._selected_rows = {}
+
     def selectionChanged(
         self, selected: QtCore.QItemSelection, deselected: QtCore.QItemSelection
     ) -> None:
-        # store selected indexes
-        indexes = []
-        model = self.model()
-        if model:
-            indexes = self.selectionModel().selectedRows()
-            if model.sourceModel():
-                indexes = [model.mapToSource(index) for index in indexes]
-                model = model.sourceModel()
-
-            # used for tracking elements about to be moved
-            model.selected_indexes = indexes
-
-        self.selected_indexes = indexes
+        # only the changed rows are updated, rows that are removed from the model
+        # are not part of deselected and are dropped once they become invalid
+        for index in self._selection_rows(deselected):
+            self._selected_rows.pop(index, None)
+        for index in self._selection_rows(selected):
+            self._selected_rows[index] = None
 
         self.selection_changed.emit()
         super().selectionChanged(selected, deselected)
 
+    def startDrag(self, supported_actions: QtCore.Qt.DropAction) -> None:
+        model = self.model()
+        if isinstance(model, QtCore.QAbstractProxyModel):
+            model = model.sourceModel()
+        # used for tracking elements about to be moved
+        model.selected_indexes = self.selected_indexes
+        super().startDrag(supported_actions)
+
+    @property
+    def selected_indexes(self) -> list[QtCore.QModelIndex]:
+        self._selected_rows = {
+            index: None for index in self._selected_rows if index.isValid()
+        }
+        indexes = [index.sibling(index.row(), 0) for index in self._selected_rows]
+        model = self.model()
+        if isinstance(model, QtCore.QAbstractProxyModel):
+            indexes = [model.mapToSource(index) for index in indexes]
+        return indexes
+
     def selected_elements(self) -> tuple:
         elements = (
             index.data(QtCore.Qt.ItemDataRole.UserRole)
-            for index in self.selected_indexes
+            for index in self._selected_rows
+            if index.isValid()
         )
         return tuple(elements)
 
-    def resize_columns(self) -> None:
-        if self.model():
+    def selected_index(self) -> QtCore.QModelIndex:
+        for index in self._selected_rows:
+            if index.isValid():
+                index = index.sibling(index.row(), 0)
+                model = self.model()
+                if isinstance(model, QtCore.QAbstractProxyModel):
+                    index = model.mapToSource(index)
+                return index
+        return QtCore.QModelIndex()
+
+    def rowsInserted(self, parent: QtCore.QModelIndex, start: int, end: int) -> None:
+        super().rowsInserted(parent, start, end)
+        if self._column_widths:
+            self._update_column_widths(parent, start, end)
+
+    def resize_columns(self, columns: Iterable[int] | None = None) -> None:
+        model = self.model()
+        if not model:
+            return
+        source_model = model
+        if isinstance(model, QtCore.QAbstractProxyModel):
+            source_model = model.sourceModel()
+        if not isinstance(source_model, _ElementModelMixin):
             self.expandAll()
-            for column in range(self.model().columnCount()):
+            if columns is None:
+                columns = range(model.columnCount())
+            for column in columns:
                 self.resizeColumnToContents(column)
             self.collapseAll()
+            return
+
+        # estimate the widths from the longest values of each field instead of
+        # measuring every row of the expanded tree
+        self._column_widths = {}
+        if columns is None:
+            columns = range(len(source_model.fields))
+        for column in columns:
+            field = source_model.fields[column]
+            width = self.header().sectionSizeHint(column)
+            values = source_model.widest_values(
+                field, self.resize_samples, self.resize_depth_samples
+            )
+            for value, indexes in values:
+                index = max(indexes, key=self._index_depth)
+                index = index.siblingAtColumn(column)
+                width = max(width, self._text_width(value, index))
+            self._column_widths[column] = width
+            self.setColumnWidth(column, width)
+
+    @staticmethod
+    def _display_text(value: Any) -> str:
+        return '' if value is None else str(value)
+
+    @staticmethod
+    def _index_depth(index: QtCore.QModelIndex) -> int:
+        depth = 0
+        index = index.parent()
+        while index.isValid():
+            depth += 1
+            index = index.parent()
+        return depth
+
+    def _text_width(self, value: Any, index: QtCore.QModelIndex) -> int:
+        style = self.style()
+        margin = style.pixelMetric(QtWidgets.QStyle.PM_FocusFrameHMargin, None, self)
+        width = self.fontMetrics().horizontalAdvance(self._display_text(value))
+        width += (margin + 1) * 2
+        if index.column() == self.header().logicalIndex(self.treePosition()):
+            depth = self._index_depth(index) + int(self.rootIsDecorated())
+            width += depth * self.indentation()
+            if index.data(QtCore.Qt.ItemDataRole.DecorationRole) is not None:
+                icon_size = self.iconSize()
+                if not icon_size.isValid():
+                    icon_size = style.pixelMetric(QtWidgets.QStyle.PM_SmallIconSize)
+                    icon_size = QtCore.QSize(icon_size, icon_size)
+                width += icon_size.width() + (margin + 1) * 2
+        return width
+
+    @staticmethod
+    def _selection_rows(
+        selection: QtCore.QItemSelection,
+    ) -> Iterator[QtCore.QPersistentModelIndex]:
+        for selection_range in selection:
+            top_left = selection_range.topLeft()
+            for row in range(selection_range.top(), selection_range.bottom() + 1):
+                yield QtCore.QPersistentModelIndex(top_left.sibling(row, 0))
+
+    def _update_column_widths(
+        self, parent: QtCore.QModelIndex, start: int, end: int
+    ) -> None:
+        model = self.model()
+        rows = range(start, end + 1)
+        for column, column_width in self._column_widths.items():
+            indexes = (model.index(row, column, parent) for row in rows)
+            indexes = heapq.nlargest(
+                self.resize_samples,
+                indexes,
+                key=lambda index: len(self._display_text(index.data())),
+            )
+            width = max(
+                (self._text_width(index.data(), index) for index in indexes),
+                default=0,
+            )
+            if width > column_width:
+                self._column_widths[column] = width
+                self.setColumnWidth(column, max(width, self.columnWidth(column)))
 
 
 class ElementBrowser(QtWidgets.QWidget):
     selection_changed: QtCore.Signal = QtCore.Signal()
 
+    compact_model = False
+    filter_delay = 150
+
     def __init__(
         self,
         fields: Sequence[Field] = (),
@@ -393,7 +1774,10 @@ class ElementBrowser(QtWidgets.QWidget):
         self._init_ui()
 
     def _init_model(self) -> None:
-        self.model = ElementModel(self._fields, self)
+        if self.compact_model:
+            self.model = CompactElementModel(self._fields, self)
+        else:
+            self.model = ElementModel(self._fields, self)
         self.proxy = ElementProxyModel(self)
         self.proxy.setAutoAcceptChildRows(True)
         self.proxy.setDynamicSortFilter(False)
@@ -432,10 +1816,16 @@ class ElementBrowser(QtWidgets.QWidget):
             slot=self.add_group,
         )
 
-        filter_bar = QtWidgets.QLineEdit()
-        filter_bar.setPlaceholderText('Filter...')
-        filter_bar.textChanged.connect(self.filter)
-        action = self.toolbar.addWidget(filter_bar)
+        # filter after typing stopped for filter_delay milliseconds
+        self._filter_timer = QtCore.QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(self.filter_delay)
+        self._filter_timer.timeout.connect(self._apply_filter)
+
+        self._filter_bar = QtWidgets.QLineEdit()
+        self._filter_bar.setPlaceholderText('Filter...')
+        self._filter_bar.textChanged.connect(self._filter_timer.start)
+        action = self.toolbar.addWidget(self._filter_bar)
         action.setText('Filter')
 
         self.tree = ElementTree()
@@ -449,10 +1839,12 @@ class ElementBrowser(QtWidgets.QWidget):
         self._update_action_states()
 
     def filter(self, text: str) -> None:
+        self._filter_timer.stop()
         self.tree.collapseAll()
-        self.proxy.setFilterWildcard(text)
-        if text:
-            self.tree.expandAll()
+        self.proxy.set_filter_text(text)
+        # only expand the branches that lead to matching rows
+        for index in self.proxy.matching_branches():
+            self.tree.expand(self.proxy.mapFromSource(index))
 
     def add_element(self) -> QtCore.QModelIndex:
         element = 'Unnamed'
@@ -474,13 +1866,13 @@ class ElementBrowser(QtWidgets.QWidget):
         label: str | None = None,
         icon: QtGui.QIcon | None = None,
         slot: Callable | None = None,
-    ) -> QAction:
+    ) -> QtGui.QAction:
         if name in self._actions:
             raise ValueError(f'Action with name {name} already exists.')
         if label is None:
             label = title(name)
 
-        action = QAction(self)
+        action = QtGui.QAction(self)
         if label:
             action.setText(label)
         if icon:
@@ -507,51 +1899,67 @@ class ElementBrowser(QtWidgets.QWidget):
             self.toolbar.removeAction(action)
 
     def remove_selected(self) -> None:
-        # build list of persistent indexes so that indexes don't changed
-        # as rows are removed
-        persistent_indexes = [
-            QtCore.QPersistentModelIndex(index) for index in self.tree.selected_indexes
+        indexes = [
+            index
+            for index in self.tree.selected_indexes
+            if check_flag(index, QtCore.Qt.ItemIsDragEnabled)
         ]
-        for index in persistent_indexes:
-            if index.isValid() and check_flag(index, QtCore.Qt.ItemIsDragEnabled):
-                self.model.removeRow(index.row(), index.parent())
+        self.model.remove_indexes(indexes)
 
     def select_elements(self, elements: Sequence) -> None:
-        selection_model = self.tree.selectionModel()
-        selection_model.clear()
+        # group rows by parent so that consecutive rows are selected as one range
+        parent_rows = {}
         for element in elements:
-            indexes = self.model.find_indexes(element)
-            for index in indexes:
+            for index in self.model.find_indexes(element):
                 index = self.proxy.mapFromSource(index)
-                selection_model.select(index, QtCore.QItemSelectionModel.Select)
+                if index.isValid():
+                    parent_rows.setdefault(index.parent(), set()).add(index.row())
+
+        selection = QtCore.QItemSelection()
+        for parent, rows in parent_rows.items():
+            rows = sorted(rows)
+            start = previous = rows[0]
+            for row in rows[1:] + [None]:
+                if row != previous + 1:
+                    selection.select(
+                        self.proxy.index(start, 0, parent),
+                        self.proxy.index(previous, 0, parent),
+                    )
+                    start = row
+                previous = row
+
+        self.tree.selectionModel().select(
+            selection,
+            QtCore.QItemSelectionModel.ClearAndSelect | QtCore.QItemSelectionModel.Rows,
+        )
 
     def selected_elements(self) -> tuple:
         return self.tree.selected_elements()
 
+    def _apply_filter(self) -> None:
+        self.filter(self._filter_bar.text())
+
     def _current_parent(self) -> QtCore.QModelIndex:
-        indexes = self.tree.selected_indexes
-        if indexes:
-            index = indexes[0]
-            if check_flag(index, QtCore.Qt.ItemNeverHasChildren):
-                index = index.parent()
-        else:
-            index = QtCore.QModelIndex()
+        index = self.tree.selected_index()
+        if index.isValid() and check_flag(index, QtCore.Qt.ItemNeverHasChildren):
+            index = index.parent()
         return index
 
     def _update_action_states(self) -> None:
-        indexes = self.tree.selected_indexes
+        index = self.tree.selected_index()
+        selected = index.isValid()
         no_children = False
         movable = True
-        if indexes:
-            no_children = check_flag(indexes[0], QtCore.Qt.ItemNeverHasChildren)
-            movable = check_flag(indexes[0], QtCore.Qt.ItemIsDragEnabled)
+        if selected:
+            no_children = check_flag(index, QtCore.Qt.ItemNeverHasChildren)
+            movable = check_flag(index, QtCore.Qt.ItemIsDragEnabled)
 
         try:
-            self._actions['remove'].setEnabled(bool(indexes) and movable)
+            self._actions['remove'].setEnabled(selected and movable)
         except KeyError:
             pass
 
         try:
-            self._actions['duplicate_element'].setEnabled(bool(indexes) and no_children)
+            self._actions['duplicate_element'].setEnabled(selected and no_children)
         except KeyError:
             pass
@@ -1,24 +1,404 @@
 from __future__ import annotations
 
+import concurrent.futures
+import contextlib
 import dataclasses
+import itertools
 import logging
 import os
 import shutil
-from typing import Sequence
+import sqlite3
+import stat
+from typing import Callable, Sequence
 
 from qt_material_icons import MaterialIcon
 from qtpy import QtGui, QtCore, QtWidgets
 
 from .elementbrowser import ElementBrowser, Field, ElementDelegate
-from .helper import unique_path
+from .helper import PathAllocator, unique_path
 
 logger = logging.getLogger(__name__)
 
+# fields of FileElement that are read from the file metadata
+_INFO_FIELDS = ('modified', 'size', 'type')
+
+
+@dataclasses.dataclass
+class FileInfo:
+    size: int | None
+    modified: QtCore.QDateTime
+    type: str
+    mtime_ns: int
+
+    @classmethod
+    def from_stat(cls, path: str, stat_result: os.stat_result) -> FileInfo:
+        if stat.S_ISDIR(stat_result.st_mode):
+            size = None
+            file_type = 'Folder'
+        else:
+            size = stat_result.st_size
+            ext = os.path.splitext(path)[1]
+            file_type = f'{ext[1:].upper()} File' if ext else 'File'
+        modified = QtCore.QDateTime.fromMSecsSinceEpoch(
+            stat_result.st_mtime_ns // 1000000
+        )
+        return cls(size, modified, file_type, stat_result.st_mtime_ns)
+
 
 @dataclasses.dataclass
 class FileElement:
     name: str
     path: str
+    # metadata is read from the latest scandir entry when it is first requested
+    entry: os.DirEntry | None = dataclasses.field(
+        default=None, repr=False, compare=False
+    )
+    info: FileInfo | None = dataclasses.field(default=None, repr=False, compare=False)
+
+    def __deepcopy__(self, memo: dict) -> FileElement:
+        # scandir entries can't be copied, copies read their metadata again
+        return FileElement(self.name, self.path)
+
+    @property
+    def modified(self) -> QtCore.QDateTime | None:
+        info = self.file_info()
+        return info.modified if info else None
+
+    @property
+    def size(self) -> int | None:
+        info = self.file_info()
+        return info.size if info else None
+
+    def file_info(self) -> FileInfo | None:
+        if self.entry is None and self.info is not None:
+            return self.info
+
+        entry, self.entry = self.entry, None
+        try:
+            stat_result = entry.stat() if entry else os.stat(self.path)
+        except OSError:
+            self.info = None
+            return None
+        # the cached info is kept as long as the modification time is the same
+        if self.info is None or self.info.mtime_ns != stat_result.st_mtime_ns:
+            self.info = FileInfo.from_stat(self.path, stat_result)
+        return self.info
+
+    @property
+    def type(self) -> str | None:
+        info = self.file_info()
+        return info.type if info else None
+
+
+class _Runnable(QtCore.QRunnable):
+    # QThreadPool only accepts callables with PySide6
+    def __init__(self, function: Callable[[], None]) -> None:
+        super().__init__()
+        self.function = function
+
+    def run(self) -> None:
+        self.function()
+
+
+class FileJob(QtCore.QObject):
+    progress_changed: QtCore.Signal = QtCore.Signal(int, int)
+    failed: QtCore.Signal = QtCore.Signal(str, str)
+    finished: QtCore.Signal = QtCore.Signal()
+
+    # operations run in parallel on a thread pool with more than one worker
+    max_workers = 1
+
+    def __init__(
+        self,
+        process: Callable[[str, str], None],
+        operations: Sequence[tuple[str, str]] = (),
+        parent: QtCore.QObject | None = None,
+    ) -> None:
+        super().__init__(parent)
+
+        self.process = process
+        self.operations = list(operations)
+        self.completed: list[tuple[str, str]] = []
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    def run(self) -> None:
+        # cancelling stops the job before the next operation, operations can be
+        # added while the job is running unless it runs in parallel
+        total = len(self.operations)
+        if self.max_workers > 1:
+            with concurrent.futures.ThreadPoolExecutor(self.max_workers) as executor:
+                results = executor.map(self._run_operation, self.operations)
+                for i, _ in enumerate(results):
+                    self.progress_changed.emit(i + 1, total)
+        else:
+            for i, operation in enumerate(self.operations):
+                if self._cancelled:
+                    break
+                self._run_operation(operation)
+                self.progress_changed.emit(i + 1, len(self.operations))
+        self.finished.emit()
+
+    def start(self) -> None:
+        QtCore.QThreadPool.globalInstance().start(_Runnable(self.run))
+
+    def _run_operation(self, operation: tuple[str, str]) -> None:
+        if self._cancelled:
+            return
+        source, destination = operation
+        try:
+            self.process(source, destination)
+        except OSError as e:
+            logger.exception(e)
+            self.failed.emit(source, str(e))
+        else:
+            self.completed.append(operation)
+
+
+class CopyJob(FileJob):
+    def __init__(
+        self,
+        operations: Sequence[tuple[str, str]] = (),
+        parent: QtCore.QObject | None = None,
+    ) -> None:
+        super().__init__(copy_path, operations, parent)
+
+
+class MoveJob(FileJob):
+    def __init__(
+        self,
+        operations: Sequence[tuple[str, str]] = (),
+        parent: QtCore.QObject | None = None,
+    ) -> None:
+        super().__init__(move_path, operations, parent)
+
+
+class RemoveJob(FileJob):
+    def __init__(
+        self, paths: Sequence[str] = (), parent: QtCore.QObject | None = None
+    ) -> None:
+        super().__init__(remove_path, [(path, '') for path in paths], parent)
+
+
+class ScanJob(FileJob):
+    entries_found: QtCore.Signal = QtCore.Signal(str, object, object)
+
+    # maximum number of entries per entries_found signal
+    batch_size = 1000
+    # the stat results of the entries are read on the thread pool, scandir
+    # entries keep them so file metadata doesn't need to be read later
+    read_info = False
+
+    def __init__(
+        self,
+        path: str,
+        file_filter: str = '',
+        recursive: bool = True,
+        parent: QtCore.QObject | None = None,
+    ) -> None:
+        super().__init__(self._scan, [(path, '')], parent)
+
+        self.path = path
+        self.file_filter = file_filter
+        self.recursive = recursive
+        # modification times of the scanned directories
+        self.mtimes: dict[str, int] = {}
+
+    def _list_dir(self, path: str) -> tuple[list[os.DirEntry], list[os.DirEntry]]:
+        # the modification time is read first so that changes during the scan
+        # are detected by the next validation
+        mtime_ns = os.stat(path).st_mtime_ns
+        entries = scan_dir(path, self.file_filter)
+        self.mtimes[path] = mtime_ns
+
+        if self.read_info:
+            for entry in itertools.chain(*entries):
+                try:
+                    entry.stat()
+                except OSError:
+                    pass
+        return entries
+
+    def _scan(self, path: str, destination: str) -> None:
+        # directories are scanned in the order they are found so that parent
+        # directories are always emitted before their children
+        subdirs = self._scan_dir(path)
+        if self.recursive:
+            self.operations.extend((subdir, '') for subdir in subdirs)
+
+    def _scan_dir(self, path: str) -> list[str]:
+        dir_entries, file_entries = self._list_dir(path)
+
+        size = self.batch_size
+        for start in range(0, max(len(dir_entries), len(file_entries)), size):
+            self.entries_found.emit(
+                path,
+                dir_entries[start : start + size],
+                file_entries[start : start + size],
+            )
+
+        # like os.walk, symlinks to directories are not followed
+        return [entry.path for entry in dir_entries if not entry.is_symlink()]
+
+
+class ValidateJob(ScanJob):
+    # compares the modification times of cached directories and only scans the
+    # directories that changed, entries_found is emitted with all the entries
+    # of a changed directory
+
+    def __init__(
+        self,
+        path: str,
+        cached_dirs: dict[str, tuple[int, Sequence[str]]],
+        file_filter: str = '',
+        parent: QtCore.QObject | None = None,
+    ) -> None:
+        super().__init__(path, file_filter, True, parent)
+
+        self.cached_dirs = cached_dirs
+        self.changed_paths: list[str] = []
+
+    def _scan_dir(self, path: str) -> list[str]:
+        cached_dir = self.cached_dirs.get(path)
+        if cached_dir is not None:
+            mtime_ns, subdirs = cached_dir
+            try:
+                if os.stat(path).st_mtime_ns == mtime_ns:
+                    self.mtimes[path] = mtime_ns
+                    return [
+                        subdir
+                        for subdir in subdirs
+                        if subdir in self.cached_dirs or not os.path.islink(subdir)
+                    ]
+            except OSError:
+                # removed directories are synced with their parent directory
+                return []
+
+        dir_entries, file_entries = self._list_dir(path)
+        self.changed_paths.append(path)
+        self.entries_found.emit(path, dir_entries, file_entries)
+        return [entry.path for entry in dir_entries if not entry.is_symlink()]
+
+
+def copy_path(source: str, destination: str) -> None:
+    if os.path.isdir(source):
+        shutil.copytree(source, destination)
+    else:
+        shutil.copy(source, destination)
+
+
+def move_path(source: str, destination: str) -> None:
+    if os.path.exists(destination):
+        raise FileExistsError(f'File Exists: {destination}')
+    shutil.move(source, destination)
+
+
+def remove_path(source: str, destination: str = '') -> None:
+    if os.path.isdir(source):
+        shutil.rmtree(source)
+    elif os.path.isfile(source):
+        os.remove(source)
+
+
+def scan_dir(
+    path: str, file_filter: str = ''
+) -> tuple[list[os.DirEntry], list[os.DirEntry]]:
+    with os.scandir(path) as it:
+        entries = sorted(it, key=lambda entry: entry.name.casefold())
+
+    dir_entries = []
+    file_entries = []
+    for entry in entries:
+        if entry.is_dir():
+            dir_entries.append(entry)
+        elif entry.name.endswith(file_filter):
+            file_entries.append(entry)
+    return dir_entries, file_entries
+
+
+class TreeCache:
+    # stores scanned trees in a SQLite database keyed by their root path, every
+    # directory is stored as one row with its modification time and the names
+    # of its directories and files
+
+    # seconds to wait for another connection to release the database
+    timeout = 10.0
+
+    _save_pool: QtCore.QThreadPool | None = None
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def load(self, root: str) -> dict[str, tuple[int, list[str], list[str]]]:
+        with contextlib.closing(self._connect()) as connection:
+            rows = connection.execute(
+                'SELECT path, mtime_ns, dir_names, file_names FROM dirs '
+                'WHERE root = ?',
+                (root,),
+            ).fetchall()
+
+        dirs = {}
+        for path, mtime_ns, dir_names, file_names in rows:
+            path = os.path.normpath(os.path.join(root, path))
+            dirs[path] = (mtime_ns, _split_names(dir_names), _split_names(file_names))
+        return dirs
+
+    def save(
+        self, root: str, dirs: dict[str, tuple[int, Sequence[str], Sequence[str]]]
+    ) -> None:
+        rows = (
+            (
+                root,
+                os.path.relpath(path, root),
+                mtime_ns,
+                '\0'.join(dir_names),
+                '\0'.join(file_names),
+            )
+            for path, (mtime_ns, dir_names, file_names) in dirs.items()
+        )
+        with contextlib.closing(self._connect()) as connection:
+            with connection:
+                connection.execute('DELETE FROM dirs WHERE root = ?', (root,))
+                connection.executemany('INSERT INTO dirs VALUES (?, ?, ?, ?, ?)', rows)
+
+    def save_later(
+        self, root: str, dirs: dict[str, tuple[int, Sequence[str], Sequence[str]]]
+    ) -> None:
+        # saves of all caches share a single thread, so a later save of the same
+        # tree can't be overtaken by an earlier one
+        def save() -> None:
+            try:
+                self.save(root, dirs)
+            except sqlite3.Error as e:
+                logger.exception(e)
+
+        self.save_pool().start(_Runnable(save))
+
+    @classmethod
+    def save_pool(cls) -> QtCore.QThreadPool:
+        if TreeCache._save_pool is None:
+            TreeCache._save_pool = QtCore.QThreadPool()
+            TreeCache._save_pool.setMaxThreadCount(1)
+        return TreeCache._save_pool
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=self.timeout)
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS dirs ('
+            'root TEXT, path TEXT, mtime_ns INTEGER, dir_names TEXT, '
+            'file_names TEXT, PRIMARY KEY (root, path))'
+        )
+        return connection
+
+
+def _split_names(names: str) -> list[str]:
+    # file names can't contain null characters
+    return names.split('\0') if names else []
 
 
 class FileNameDelegate(ElementDelegate):
@@ -56,10 +436,24 @@ class FileNameDelegate(ElementDelegate):
 
 
 class FileBrowser(ElementBrowser):
+    job_started: QtCore.Signal = QtCore.Signal(FileJob)
+
     dir_name = 'Unnamed'
     file_name = 'Unnamed'
     file_filter = ''
     sync_files = True
+    # number of files copied in parallel
+    copy_workers = 1
+    # directories are scanned when they are expanded
+    lazy_loading = False
+    # scans and file operations run as jobs on the thread pool
+    background_io = False
+    # loaded directories are watched and synced when their contents change
+    watch_files = False
+    sync_delay = 100
+    # database file of a TreeCache, the tree is loaded from the cache and then
+    # validated in the background, lazily loaded trees are not cached
+    cache_path: str | None = None
 
     def __init__(
         self,
@@ -70,44 +464,70 @@ class FileBrowser(ElementBrowser):
         super().__init__(fields, parent)
 
         self.path = os.path.normpath(path)
+        self._dir_icon = MaterialIcon('folder')
+        self._dir_indexes: dict[str, QtCore.QPersistentModelIndex] = {}
+        self._dir_mtimes: dict[str, int] = {}
+        self._jobs: list[FileJob] = []
+        self._pending_selection: tuple = ()
+
+        self._pending_syncs: dict[str, None] = {}
+        self._sync_timer = QtCore.QTimer(self)
+        self._sync_timer.setSingleShot(True)
+        self._sync_timer.setInterval(self.sync_delay)
+        self._sync_timer.timeout.connect(self._sync_pending)
+        self._watcher = QtCore.QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._schedule_sync)
+
+        self._pending_moves: list[tuple[str, str]] = []
+        self._move_timer = QtCore.QTimer(self)
+        self._move_timer.setSingleShot(True)
+        self._move_timer.setInterval(0)
+        self._move_timer.timeout.connect(self._move_pending)
+
+        self._tree_cache: TreeCache | None = None
+        if self.cache_path and not self.lazy_loading:
+            self._tree_cache = TreeCache(self.cache_path)
 
         self._init_elements()
 
         self.model.element_moved.connect(self._move_element)
         self.model.element_changed.connect(self._change_element)
+        self.model.fetch_requested.connect(self._fetch_dir)
 
     def _init_ui(self) -> None:
         super()._init_ui()
 
         delegate = FileNameDelegate(parent=self)
         self.tree.setItemDelegateForColumn(0, delegate)
+        # resizing to contents only reads the metadata of the visible rows
+        self.tree.header().setResizeContentsPrecision(0)
 
         icon = MaterialIcon('refresh')
         action = QtGui.QAction(icon, 'Refresh', self)
         action.triggered.connect(self.refresh)
         self.toolbar.addAction(action)
 
-    def _init_elements(self) -> None:
-        for root, dirs, files in os.walk(self.path):
-            indexes = self.model.find_indexes(root, Field('path'))
-            if os.path.normpath(root) == self.path:
-                parent = QtCore.QModelIndex()
-            elif indexes:
-                parent = indexes[0]
-            else:
-                break
+    def _init_model(self) -> None:
+        # metadata fields are read when the compact model requests them, the
+        # element model would read them for every row that is appended
+        if any(field.name in _INFO_FIELDS for field in self._fields):
+            self.compact_model = True
+        super()._init_model()
 
-            for name in dirs:
-                path = os.path.join(root, name)
-                self._append_dir(path, parent)
-            for name in files:
-                if not name.endswith(self.file_filter):
-                    continue
-                path = os.path.join(root, name)
-                self._append_file(path, parent)
+    def _init_elements(self) -> None:
+        self._watch([self.path])
+        if self._load_cache():
+            self.proxy.sort(0)
+            self._resize_columns()
+            return
+        if self.background_io:
+            self._scan(self.path, recursive=not self.lazy_loading)
+            return
 
+        self._load_tree([(self.path, QtCore.QModelIndex())])
         self.proxy.sort(0)
-        self.tree.resize_columns()
+        self._resize_columns()
+        self._save_cache()
 
     def add_element(self) -> QtCore.QModelIndex:
         parent = self._current_parent()
@@ -152,34 +572,64 @@ class FileBrowser(ElementBrowser):
         index = self._append_dir(path, parent)
         return index
 
+    def cancel_jobs(self) -> None:
+        for job in self._jobs:
+            job.cancel()
+
+    def copy_paths(self, operations: Sequence[tuple[str, str]]) -> FileJob:
+        job = CopyJob(operations)
+        job.max_workers = self.copy_workers
+        job.finished.connect(self._copy_finished)
+        self._run_job(job)
+        return job
+
     def duplicate_selected(self) -> tuple[QtCore.QModelIndex, ...]:
+        # destination paths are allocated for the whole selection at once
+        paths = PathAllocator()
+        operations = [
+            (element.path, paths.allocate(element.path))
+            for element in self.selected_elements()
+        ]
+        job = self.copy_paths(operations)
+        if self.background_io:
+            return ()
+
         indexes = []
-        for index in self.tree.selected_indexes:
-            element = self.model.element(index)
-            path = unique_path(element.path)
-            try:
-                shutil.copy(element.path, path)
-            except OSError as e:
-                logger.exception(e)
-                continue
-            copied_index = self.model.duplicate_index(index)
-            copied_element = self.model.element(copied_index)
-            copied_element.path = path
-            self.model.refresh_index(copied_index)
-            indexes.append(copied_index)
+        for source, destination in job.completed:
+            indexes.extend(self.model.find_indexes(destination, Field('path')))
         return tuple(indexes)
 
+    def jobs(self) -> tuple[FileJob, ...]:
+        return tuple(self._jobs)
+
+    def move_paths(self, operations: Sequence[tuple[str, str]]) -> FileJob:
+        job = MoveJob(operations)
+        job.finished.connect(self._move_finished)
+        self._run_job(job)
+        return job
+
     def refresh(self) -> None:
         self.blockSignals(True)
         elements = self.selected_elements()
 
+        for job in self._jobs:
+            if isinstance(job, ScanJob):
+                job.cancel()
         self.model.clear()
+        self._dir_indexes.clear()
+        self._dir_mtimes.clear()
+        self._pending_syncs.clear()
+        self._unwatch(self._watcher.directories())
 
         self.sync_files = False
         self._init_elements()
         self.sync_files = True
 
-        self.select_elements(elements)
+        if self.background_io:
+            # the selection is restored once the scan is finished
+            self._pending_selection = elements
+        else:
+            self.select_elements(elements)
         self.blockSignals(False)
 
     def remove_selected(self) -> None:
@@ -194,22 +644,78 @@ class FileBrowser(ElementBrowser):
         # if result == QtWidgets.QMessageBox.StandardButton.No:
         #     return
 
+        self.remove_paths([element.path for element in self.selected_elements()])
+
+    def remove_paths(self, paths: Sequence[str]) -> FileJob:
+        job = RemoveJob(paths)
+        job.finished.connect(self._remove_finished)
+        self._run_job(job)
+        return job
+
+    def sync_dir(self, path: str) -> None:
+        # only the rows that differ from the directory contents are updated
+        path = os.path.normpath(path)
+        parent = self._dir_index(path)
+        if parent is None or self.model.canFetchMore(parent):
+            return
         try:
-            for element in self.selected_elements():
-                if os.path.isdir(element.path):
-                    shutil.rmtree(element.path)
-                elif os.path.isfile(element.path):
-                    os.remove(element.path)
-        except OSError as e:
-            logger.exception(e)
+            dir_entries, file_entries = self._list_dir(path)
+        except OSError:
+            # removed directories are synced with their parent directory
+            return
+        self._sync_entries(parent, dir_entries, file_entries)
+
+    def _sync_entries(
+        self,
+        parent: QtCore.QModelIndex,
+        dir_entries: Sequence[os.DirEntry],
+        file_entries: Sequence[os.DirEntry],
+        load_subdirs: bool = True,
+    ) -> None:
+        entries = {entry.path: entry for entry in (*dir_entries, *file_entries)}
+        indexes = {}
+        for row in range(self.model.rowCount(parent)):
+            index = self.model.index(row, 0, parent)
+            element = self.model.element(index)
+            if isinstance(element, FileElement):
+                indexes[element.path] = QtCore.QPersistentModelIndex(index)
+
+        for element_path, index in indexes.items():
+            if element_path not in entries and index.isValid():
+                self._forget_dir(element_path)
+                self.model.removeRow(index.row(), index.parent())
+
+        if self._has_info_fields():
+            # metadata that was already read is compared with the new entries
+            for element_path, index in indexes.items():
+                if element_path not in entries or not index.isValid():
+                    continue
+                index = index.sibling(index.row(), 0)
+                element = self.model.element(index)
+                info = element.info
+                element.entry = entries[element_path]
+                if info is not None and element.file_info() is not info:
+                    self.model.refresh_index(index)
+
+        dir_entries = [entry for entry in dir_entries if entry.path not in indexes]
+        file_entries = [entry for entry in file_entries if entry.path not in indexes]
+        if not dir_entries and not file_entries:
+            return
+        dir_indexes = self._append_entries(parent, dir_entries, file_entries)
+        if not load_subdirs:
             return
-        super().remove_selected()
+        self._load_subdirs(
+            [
+                (entry.path, index)
+                for entry, index in zip(dir_entries, dir_indexes)
+                if not entry.is_symlink()
+            ]
+        )
 
     def _append_dir(self, path: str, parent: QtCore.QModelIndex) -> QtCore.QModelIndex:
         name = os.path.basename(path)
         element = FileElement(name=name, path=path)
-        icon = MaterialIcon('folder')
-        index = self.model.append_element(element, icon=icon, parent=parent)
+        index = self.model.append_element(element, icon=self._dir_icon, parent=parent)
         return index
 
     def _append_file(self, path: str, parent: QtCore.QModelIndex) -> QtCore.QModelIndex:
@@ -218,17 +724,363 @@ class FileBrowser(ElementBrowser):
         index = self.model.append_element(element, no_children=True, parent=parent)
         return index
 
+    def _fetch_dir(self, index: QtCore.QModelIndex) -> None:
+        element = self.model.element(index)
+        if not isinstance(element, FileElement):
+            return
+        self._watch([element.path])
+        if self.background_io:
+            self._scan(element.path, recursive=False)
+        else:
+            self._load_dir(element.path, index)
+
+    def _append_entries(
+        self,
+        parent: QtCore.QModelIndex,
+        dir_entries: Sequence[os.DirEntry | str],
+        file_entries: Sequence[os.DirEntry | str],
+    ) -> tuple[QtCore.QModelIndex, ...]:
+        # scandir entries are only kept when metadata is shown
+        keep_entries = self._has_info_fields()
+        dir_elements = [
+            self._create_element(entry, keep_entries) for entry in dir_entries
+        ]
+        file_elements = [
+            self._create_element(entry, keep_entries) for entry in file_entries
+        ]
+        dir_indexes = self.model.append_elements(
+            dir_elements, icon=self._dir_icon, parent=parent
+        )
+        self.model.append_elements(file_elements, no_children=True, parent=parent)
+
+        dir_paths = [element.path for element in dir_elements]
+        for path, index in zip(dir_paths, dir_indexes):
+            self._dir_indexes[path] = QtCore.QPersistentModelIndex(index)
+            if self.lazy_loading:
+                self.model.set_fetchable(index)
+        if not self.lazy_loading:
+            self._watch(dir_paths)
+        return dir_indexes
+
+    def _copy_finished(self) -> None:
+        # the copies are appended with one batch per directory
+        job = self.sender()
+        dir_paths = {}
+        file_paths = {}
+        for source, destination in job.completed:
+            parent_path = os.path.dirname(destination)
+            if os.path.isdir(destination):
+                dir_paths.setdefault(parent_path, []).append(destination)
+            else:
+                file_paths.setdefault(parent_path, []).append(destination)
+
+        dirs = []
+        for parent_path in {**dir_paths, **file_paths}:
+            parent = self._dir_index(parent_path)
+            if parent is None or self.model.canFetchMore(parent):
+                continue
+            paths = dir_paths.get(parent_path, [])
+            dir_indexes = self._append_entries(
+                parent, paths, file_paths.get(parent_path, [])
+            )
+            dirs.extend(zip(paths, dir_indexes))
+        self._load_subdirs(dirs)
+
+    @staticmethod
+    def _create_element(entry: os.DirEntry | str, keep_entry: bool) -> FileElement:
+        if isinstance(entry, str):
+            return FileElement(os.path.basename(entry), entry)
+        return FileElement(entry.name, entry.path, entry if keep_entry else None)
+
+    def _dir_index(self, path: str) -> QtCore.QModelIndex | None:
+        if path == self.path:
+            return QtCore.QModelIndex()
+        persistent_index = self._dir_indexes.get(path)
+        if persistent_index is None or not persistent_index.isValid():
+            return None
+        return persistent_index.sibling(persistent_index.row(), 0)
+
+    def _forget_dir(self, path: str) -> None:
+        prefix = os.path.join(path, '')
+        paths = [
+            dir_path
+            for dir_path in self._dir_indexes
+            if dir_path == path or dir_path.startswith(prefix)
+        ]
+        for dir_path in paths:
+            del self._dir_indexes[dir_path]
+            self._dir_mtimes.pop(dir_path, None)
+        self._unwatch(paths)
+
+    def _has_info_fields(self) -> bool:
+        return any(field.name in _INFO_FIELDS for field in self.model.fields)
+
+    def _job_finished(self) -> None:
+        job = self.sender()
+        if job in self._jobs:
+            self._jobs.remove(job)
+
+    def _load_dir(
+        self, path: str, parent: QtCore.QModelIndex
+    ) -> list[tuple[str, QtCore.QModelIndex]]:
+        try:
+            dir_entries, file_entries = self._list_dir(path)
+        except OSError as e:
+            logger.exception(e)
+            return []
+
+        dir_indexes = self._append_entries(parent, dir_entries, file_entries)
+        if self.lazy_loading:
+            return []
+
+        # like os.walk, symlinks to directories are not followed
+        dirs = [
+            (entry.path, index)
+            for entry, index in zip(dir_entries, dir_indexes)
+            if not entry.is_symlink()
+        ]
+        return dirs
+
+    def _list_dir(self, path: str) -> tuple[list[os.DirEntry], list[os.DirEntry]]:
+        # modification times are only needed for the cache
+        mtime_ns = os.stat(path).st_mtime_ns if self._tree_cache else None
+        entries = scan_dir(path, self.file_filter)
+        if mtime_ns is not None:
+            self._dir_mtimes[path] = mtime_ns
+        return entries
+
+    def _load_cache(self) -> bool:
+        if self._tree_cache is None:
+            return False
+        try:
+            dirs = self._tree_cache.load(self.path)
+        except sqlite3.Error as e:
+            logger.exception(e)
+            return False
+        if self.path not in dirs:
+            return False
+
+        # the cached tree is shown right away, the cached modification times
+        # are only trusted once the validation confirmed them
+        cached_dirs = {}
+        stack = [(self.path, QtCore.QModelIndex())]
+        while stack:
+            path, parent = stack.pop()
+            mtime_ns, dir_names, file_names = dirs[path]
+            dir_paths = [os.path.join(path, name) for name in dir_names]
+            file_paths = [os.path.join(path, name) for name in file_names]
+            dir_indexes = self._append_entries(parent, dir_paths, file_paths)
+            cached_dirs[path] = (mtime_ns, dir_paths)
+            stack.extend(
+                (dir_path, index)
+                for dir_path, index in zip(dir_paths, dir_indexes)
+                if dir_path in dirs
+            )
+
+        job = ValidateJob(self.path, cached_dirs, self.file_filter)
+        job.read_info = self._has_info_fields()
+        job.entries_found.connect(self._validate_entries_found)
+        job.finished.connect(self._scan_finished)
+        self._run_job(job, background=True)
+        return True
+
+    def _load_subdirs(self, dirs: list[tuple[str, QtCore.QModelIndex]]) -> None:
+        # load the contents of directories appended after the initial load
+        if self.lazy_loading:
+            return
+        if self.background_io:
+            for path, index in dirs:
+                self._scan(path)
+        else:
+            self._load_tree(dirs)
+
+    def _load_tree(self, dirs: list[tuple[str, QtCore.QModelIndex]]) -> None:
+        # every directory is scanned once, the indexes of the directories
+        # still to be scanned are kept with their paths
+        while dirs:
+            path, parent = dirs.pop()
+            dirs.extend(self._load_dir(path, parent))
+
+    def _move_finished(self) -> None:
+        job = self.sender()
+        completed = set(job.completed)
+        sync_paths = {}
+        for source, destination in job.operations:
+            moved = (source, destination) in completed
+            path = destination if moved else source
+
+            # dropped rows are already in the destination, renamed rows stay in
+            # place, other rows are moved by syncing both directories
+            parent = self._dir_index(os.path.dirname(path))
+            updated = False
+            for index in self.model.find_indexes(source, Field('path')):
+                if parent is not None and index.parent() == parent:
+                    self._update_path(index, path)
+                    updated = True
+            if not moved:
+                # dropped rows are only removed once the drop is done
+                self._schedule_sync(os.path.dirname(source))
+                self._schedule_sync(os.path.dirname(destination))
+            elif not updated:
+                sync_paths[os.path.dirname(source)] = None
+                sync_paths[os.path.dirname(destination)] = None
+
+        for path in sync_paths:
+            self.sync_dir(path)
+
+    def _remove_finished(self) -> None:
+        job = self.sender()
+        indexes = []
+        for source, destination in job.completed:
+            self._forget_dir(source)
+            indexes.extend(self.model.find_indexes(source, Field('path')))
+        self.model.remove_indexes(indexes)
+
+    def _schedule_sync(self, path: str) -> None:
+        self._pending_syncs[os.path.normpath(path)] = None
+        self._sync_timer.start()
+
+    def _resize_columns(self) -> None:
+        # metadata columns are measured from the visible rows only
+        columns = []
+        for column, field in enumerate(self.model.fields):
+            if field.name in _INFO_FIELDS:
+                self.tree.resizeColumnToContents(column)
+            else:
+                columns.append(column)
+        self.tree.resize_columns(columns)
+
+    def _save_cache(self) -> None:
+        if self._tree_cache is None:
+            return
+
+        # every loaded directory with a known modification time is stored
+        dirs = {}
+        for path, mtime_ns in self._dir_mtimes.items():
+            parent = self._dir_index(path)
+            if parent is None:
+                continue
+            dir_names = []
+            file_names = []
+            for row in range(self.model.rowCount(parent)):
+                element = self.model.element(self.model.index(row, 0, parent))
+                if not isinstance(element, FileElement):
+                    continue
+                if element.path in self._dir_indexes:
+                    dir_names.append(element.name)
+                else:
+                    file_names.append(element.name)
+            dirs[path] = (mtime_ns, dir_names, file_names)
+        self._tree_cache.save_later(self.path, dirs)
+
+    def _scan(self, path: str, recursive: bool = True) -> None:
+        job = ScanJob(path, self.file_filter, recursive)
+        job.read_info = self._has_info_fields()
+        job.entries_found.connect(self._scan_entries_found)
+        job.finished.connect(self._scan_finished)
+        self._run_job(job)
+
+    def _scan_entries_found(
+        self,
+        path: str,
+        dir_entries: Sequence[os.DirEntry],
+        file_entries: Sequence[os.DirEntry],
+    ) -> None:
+        # batches of cancelled scans can still be queued
+        job = self.sender()
+        if job is None or job.is_cancelled():
+            return
+        parent = self._dir_index(path)
+        if parent is not None:
+            self._append_entries(parent, dir_entries, file_entries)
+
+    def _scan_finished(self) -> None:
+        job = self.sender()
+        if job is None or job.is_cancelled():
+            return
+        if self._tree_cache:
+            self._dir_mtimes.update(job.mtimes)
+        if job.path != self.path:
+            return
+
+        self.proxy.sort(0)
+        self._resize_columns()
+        if self._pending_selection:
+            self.select_elements(self._pending_selection)
+            self._pending_selection = ()
+        if not isinstance(job, ValidateJob) or job.changed_paths:
+            self._save_cache()
+
+    def _run_job(self, job: FileJob, background: bool = False) -> None:
+        # without background io the job runs before returning
+        self._jobs.append(job)
+        job.finished.connect(self._job_finished)
+        self.job_started.emit(job)
+        if self.background_io or background:
+            job.start()
+        else:
+            job.run()
+
+    def _validate_entries_found(
+        self,
+        path: str,
+        dir_entries: Sequence[os.DirEntry],
+        file_entries: Sequence[os.DirEntry],
+    ) -> None:
+        job = self.sender()
+        if job is None or job.is_cancelled():
+            return
+        parent = self._dir_index(path)
+        if parent is not None:
+            # new directories are scanned by the validation itself
+            self._sync_entries(parent, dir_entries, file_entries, load_subdirs=False)
+
+    def _sync_pending(self) -> None:
+        paths = list(self._pending_syncs)
+        self._pending_syncs.clear()
+        for path in paths:
+            self.sync_dir(path)
+
+    def _unwatch(self, paths: Sequence[str]) -> None:
+        if paths:
+            self._watcher.removePaths(paths)
+
+    def _update_path(self, index: QtCore.QModelIndex, path: str) -> None:
+        # update the element and its children in place to keep the selection
+        # and expanded state
+        element = self.model.element(index)
+        previous_path = element.path
+        element.name = os.path.basename(path)
+        element.path = path
+        if path != previous_path:
+            element.entry = None
+            element.info = None
+        self.model.refresh_index(index)
+
+        if self.model.flags(index) & QtCore.Qt.ItemFlag.ItemNeverHasChildren:
+            return
+        if path != previous_path:
+            self._forget_dir(previous_path)
+            self._watch([path])
+        self._dir_indexes[path] = QtCore.QPersistentModelIndex(index)
+        for row in range(self.model.rowCount(index)):
+            child_index = self.model.index(row, 0, index)
+            child_element = self.model.element(child_index)
+            if isinstance(child_element, FileElement):
+                child_path = os.path.join(path, child_element.name)
+                self._update_path(child_index, child_path)
+
+    def _watch(self, paths: Sequence[str]) -> None:
+        if self.watch_files and paths:
+            self._watcher.addPaths(paths)
+
     def _change_element(self, element: FileElement, previous: FileElement) -> None:
         if element.name == previous.name:
             return
         source_path = previous.path
         parent_path = os.path.dirname(previous.path)
         destination_path = unique_path(os.path.join(parent_path, element.name))
-        try:
-            shutil.move(source_path, destination_path)
-        except OSError as e:
-            logger.exception(e)
-        self.refresh()
+        self.move_paths([(source_path, destination_path)])
 
     def _move_element(self, element: FileElement, parent: QtCore.QModelIndex) -> None:
         parent_element = self.model.element(parent)
@@ -242,10 +1094,12 @@ class FileBrowser(ElementBrowser):
         if destination_path == source_path:
             return
 
-        try:
-            if os.path.exists(destination_path):
-                raise FileExistsError(f'File Exists: {destination_path}')
-            shutil.move(source_path, destination_path)
-        except OSError as e:
-            logger.exception(e)
-        self.refresh()
+        # the elements of a drop are moved with a single job once the drop is done
+        self._pending_moves.append((source_path, destination_path))
+        self._move_timer.start()
+
+    def _move_pending(self) -> None:
+        operations = self._pending_moves
+        self._pending_moves = []
+        if operations:
+            self.move_paths(operations)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from collections.abc import Sequence
+import bisect
+import dataclasses
+from collections.abc import Iterator, Sequence
 from enum import auto, Enum
 
 from qtpy import QtCore, QtGui, QtWidgets
@@ -8,19 +10,47 @@ from qtpy import QtCore, QtGui, QtWidgets
 State_Flag = QtWidgets.QStyle.StateFlag
 ScrollHint = QtWidgets.QAbstractItemView.ScrollHint
 CursorAction = QtWidgets.QAbstractItemView.CursorAction
+ItemDataRole = QtCore.Qt.ItemDataRole
+
+# roles that can change the size hint of an item
+SIZE_ROLES = (
+    ItemDataRole.DisplayRole,
+    ItemDataRole.DecorationRole,
+    ItemDataRole.FontRole,
+    ItemDataRole.SizeHintRole,
+)
 
 
 class FlexItemDelegate(QtWidgets.QItemDelegate):
+    # when True, frames, scaled decorations and elided text are cached and blitted
+    cached_appearance = False
+    cache_limit = 4096
+
     def __init__(self, parent: QtWidgets.QWidget | None = None) -> None:
         super().__init__(parent)
         self.text_margins = QtCore.QMargins(4, 4, 4, 4)
 
+        self._frame_pixmaps = {}
+        self._decoration_pixmaps = {}
+        self._elided_texts = {}
+        self._font_metrics = {}
+
+    def clear_cache(self) -> None:
+        self._frame_pixmaps.clear()
+        self._decoration_pixmaps.clear()
+        self._elided_texts.clear()
+        self._font_metrics.clear()
+
     def paint(
         self,
         painter: QtGui.QPainter,
         option: QtWidgets.QStyleOptionViewItem,
         index: QtCore.QModelIndex,
     ) -> None:
+        if self.cached_appearance:
+            self._paint_cached(painter, option, index)
+            return
+
         # draw frame
         self._draw_frame(painter, option)
 
@@ -69,7 +99,7 @@ class FlexItemDelegate(QtWidgets.QItemDelegate):
             pixmap = self.selectedPixmap(
                 pixmap,
                 option.palette,
-                option.state & State_Flag.State_Enabled,
+                bool(option.state & State_Flag.State_Enabled),
             )
 
         source_rect = QtWidgets.QStyle.alignedRect(
@@ -112,6 +142,138 @@ class FlexItemDelegate(QtWidgets.QItemDelegate):
         # # doLayout(option, &checkRect, &decorationRect, &displayRect, True)
         # return (decorationRect | displayRect | checkRect).size()
 
+    def _paint_cached(
+        self,
+        painter: QtGui.QPainter,
+        option: QtWidgets.QStyleOptionViewItem,
+        index: QtCore.QModelIndex,
+    ) -> None:
+        rect = option.rect
+
+        # draw frame
+        painter.drawPixmap(rect.topLeft(), self._frame_pixmap(painter, option))
+
+        # draw decoration
+        font = index.data(ItemDataRole.FontRole) or option.font
+        font_metrics = self._font_metrics.get(font.key())
+        if font_metrics is None:
+            font_metrics = QtGui.QFontMetrics(font)
+            self._font_metrics[font.key()] = font_metrics
+        margins = self.text_margins
+        text_height = font_metrics.height() + margins.top() + margins.bottom()
+
+        content_rect = rect.adjusted(2, 2, -2, -2)
+        decoration_rect = QtCore.QRect(content_rect)
+        decoration_rect.setHeight(content_rect.height() - text_height)
+        value = index.data(ItemDataRole.DecorationRole)
+        if value is not None and decoration_rect.isValid():
+            pixmap = self._decoration_pixmap(option, value, decoration_rect.size())
+            if pixmap is not None:
+                source_rect = QtWidgets.QStyle.alignedRect(
+                    option.direction,
+                    option.decorationAlignment,
+                    decoration_rect.size(),
+                    pixmap.rect(),
+                )
+                painter.drawPixmap(decoration_rect, pixmap, source_rect)
+
+        # draw display
+        text = index.data(ItemDataRole.DisplayRole)
+        if text is None:
+            return
+        text_rect = content_rect.adjusted(
+            margins.left(), 0, -margins.right(), -margins.bottom()
+        )
+        text = self._elided_text(
+            str(text), font, font_metrics, text_rect.width(), option.textElideMode
+        )
+
+        if option.state & State_Flag.State_Enabled:
+            color_group = QtGui.QPalette.ColorGroup.Normal
+        else:
+            color_group = QtGui.QPalette.ColorGroup.Disabled
+        painter.save()
+        painter.setFont(font)
+        painter.setPen(option.palette.color(color_group, QtGui.QPalette.ColorRole.Text))
+        painter.drawText(text_rect, option.displayAlignment, text)
+        painter.restore()
+
+    def _decoration_pixmap(
+        self,
+        option: QtWidgets.QStyleOptionViewItem,
+        value: QtGui.QPixmap | QtGui.QIcon | QtGui.QImage,
+        size: QtCore.QSize,
+    ) -> QtGui.QPixmap | None:
+        if not isinstance(value, (QtGui.QPixmap, QtGui.QIcon, QtGui.QImage)):
+            return None
+
+        selected = bool(option.state & State_Flag.State_Selected)
+        key = (value.cacheKey(), size.width(), size.height(), selected)
+        pixmap = self._decoration_pixmaps.get(key)
+        if pixmap is None:
+            if isinstance(value, QtGui.QIcon):
+                pixmap = value.pixmap(size)
+            elif isinstance(value, QtGui.QImage):
+                pixmap = QtGui.QPixmap.fromImage(value)
+            else:
+                pixmap = value
+            if pixmap.isNull():
+                return None
+
+            pixmap = pixmap.scaled(
+                size, QtCore.Qt.AspectRatioMode.KeepAspectRatioByExpanding
+            )
+            if selected:
+                pixmap = self.selectedPixmap(
+                    pixmap,
+                    option.palette,
+                    bool(option.state & State_Flag.State_Enabled),
+                )
+            self._insert_cache(self._decoration_pixmaps, key, pixmap)
+        return pixmap
+
+    def _elided_text(
+        self,
+        text: str,
+        font: QtGui.QFont,
+        font_metrics: QtGui.QFontMetrics,
+        width: int,
+        mode: QtCore.Qt.TextElideMode,
+    ) -> str:
+        key = (text, font.key(), width, mode)
+        elided_text = self._elided_texts.get(key)
+        if elided_text is None:
+            elided_text = font_metrics.elidedText(text, mode, width)
+            self._insert_cache(self._elided_texts, key, elided_text)
+        return elided_text
+
+    def _frame_pixmap(
+        self, painter: QtGui.QPainter, option: QtWidgets.QStyleOptionViewItem
+    ) -> QtGui.QPixmap:
+        size = option.rect.size()
+        state = option.state & (State_Flag.State_Selected | State_Flag.State_Enabled)
+        ratio = painter.device().devicePixelRatioF()
+        palette_key = QtWidgets.QApplication.palette().cacheKey()
+        key = (size.width(), size.height(), int(state.value), ratio, palette_key)
+        pixmap = self._frame_pixmaps.get(key)
+        if pixmap is None:
+            pixmap = QtGui.QPixmap(size * ratio)
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(QtCore.Qt.GlobalColor.transparent)
+
+            frame_option = QtWidgets.QStyleOptionViewItem(option)
+            frame_option.rect = QtCore.QRect(QtCore.QPoint(), size)
+            frame_painter = QtGui.QPainter(pixmap)
+            self._draw_frame(frame_painter, frame_option)
+            frame_painter.end()
+            self._insert_cache(self._frame_pixmaps, key, pixmap)
+        return pixmap
+
+    def _insert_cache(self, cache: dict, key: tuple, value: object) -> None:
+        if len(cache) >= self.cache_limit:
+            cache.clear()
+        cache[key] = value
+
     @staticmethod
     def _draw_frame(
         painter: QtGui.QPainter, option: QtWidgets.QStyleOptionViewItem
@@ -158,6 +320,142 @@ class FlexItemDelegate(QtWidgets.QItemDelegate):
             painter.restore()
 
 
+class _UniformSizes:
+    # item sizes where every item has the same size
+    def __init__(self, count: int, main: int, cross: int, spacing: int) -> None:
+        self.count = count
+        self.main = main
+        self.cross = cross
+        self.spacing = spacing
+
+    def __len__(self) -> int:
+        return self.count
+
+    def advance(self, start: int, end: int) -> int:
+        # the main size of the items in [start, end) including spacing after each
+        return max(0, end - start) * (self.main + self.spacing)
+
+    def item(self, position: int) -> tuple[int, int]:
+        return self.main, self.cross
+
+    def maximum(self, start: int, end: int) -> int:
+        return self.cross if end > start else 0
+
+    def search(self, start: int, extent: int) -> int:
+        # the largest end so that advance(start, end) <= extent
+        advance = max(1, self.main + self.spacing)
+        return max(start, min(self.count, start + extent // advance))
+
+    def update(self, position: int, main: int, cross: int) -> None:
+        return
+
+
+class _SizeTree:
+    # segment tree of item sizes, storing the sum of the main sizes and the
+    # maximum of the cross sizes to allow updates and queries in O(log n)
+    def __init__(self, sizes: Sequence[tuple[int, int]], spacing: int) -> None:
+        self.count = len(sizes)
+        self.spacing = spacing
+
+        capacity = 1
+        while capacity < self.count:
+            capacity *= 2
+        self._capacity = capacity
+        self._sizes = list(sizes)
+        self._sums = [0] * (2 * capacity)
+        self._maxima = [0] * (2 * capacity)
+
+        for i, (main, cross) in enumerate(self._sizes):
+            self._sums[capacity + i] = main + spacing
+            self._maxima[capacity + i] = cross
+        for i in range(capacity - 1, 0, -1):
+            self._sums[i] = self._sums[2 * i] + self._sums[2 * i + 1]
+            self._maxima[i] = max(self._maxima[2 * i], self._maxima[2 * i + 1])
+
+    def __len__(self) -> int:
+        return self.count
+
+    def advance(self, start: int, end: int) -> int:
+        # the main size of the items in [start, end) including spacing after each
+        result = 0
+        start += self._capacity
+        end += self._capacity
+        while start < end:
+            if start & 1:
+                result += self._sums[start]
+                start += 1
+            if end & 1:
+                end -= 1
+                result += self._sums[end]
+            start //= 2
+            end //= 2
+        return result
+
+    def item(self, position: int) -> tuple[int, int]:
+        return self._sizes[position]
+
+    def maximum(self, start: int, end: int) -> int:
+        result = 0
+        start += self._capacity
+        end += self._capacity
+        while start < end:
+            if start & 1:
+                result = max(result, self._maxima[start])
+                start += 1
+            if end & 1:
+                end -= 1
+                result = max(result, self._maxima[end])
+            start //= 2
+            end //= 2
+        return result
+
+    def search(self, start: int, extent: int) -> int:
+        # the largest end so that advance(start, end) <= extent
+        target = self.advance(0, start) + extent
+        if self.count == 0 or target < 0:
+            return start
+
+        i = 1
+        total = 0
+        while i < self._capacity:
+            left = 2 * i
+            if total + self._sums[left] <= target:
+                total += self._sums[left]
+                i = left + 1
+            else:
+                i = left
+        end = i - self._capacity
+        if total + self._sums[i] <= target:
+            end += 1
+        return max(start, min(self.count, end))
+
+    def update(self, position: int, main: int, cross: int) -> None:
+        self._sizes[position] = (main, cross)
+        i = position + self._capacity
+        self._sums[i] = main + self.spacing
+        self._maxima[i] = cross
+        i //= 2
+        while i:
+            self._sums[i] = self._sums[2 * i] + self._sums[2 * i + 1]
+            self._maxima[i] = max(self._maxima[2 * i], self._maxima[2 * i + 1])
+            i //= 2
+
+
+@dataclasses.dataclass
+class _FlexLines:
+    # the lines of a flex layout, stored as parallel lists indexed by line
+    starts: list[int] = dataclasses.field(default_factory=list)
+    positions: list[int] = dataclasses.field(default_factory=list)
+    sizes: list[int] = dataclasses.field(default_factory=list)
+    offsets: list[float] = dataclasses.field(default_factory=list)
+    gaps: list[float] = dataclasses.field(default_factory=list)
+    grows: list[float] = dataclasses.field(default_factory=list)
+    main_extent: int = 0
+    cross_extent: int = 0
+    available: int = 0
+    viewport_size: QtCore.QSize = dataclasses.field(default_factory=QtCore.QSize)
+
+
 class FlexView(QtWidgets.QAbstractItemView):
     class PositionFlags(Enum):
         START = auto()
@@ -171,14 +469,14 @@ class FlexView(QtWidgets.QAbstractItemView):
 
     class LayoutFlags(Enum):
         ROW = auto()
-        # ROW_REVERSE = auto()
-        # COLUMN = auto()
-        # COLUMN_REVERSE = auto()
+        ROW_REVERSE = auto()
+        COLUMN = auto()
+        COLUMN_REVERSE = auto()
 
     class WrapFlags(Enum):
         NONE = 0
         WRAP = auto()
-        # WRAP_REVERSE = auto()
+        WRAP_REVERSE = auto()
 
     flex_direction: LayoutFlags = LayoutFlags.ROW
     align_content: PositionFlags = PositionFlags.START
@@ -189,13 +487,23 @@ class FlexView(QtWidgets.QAbstractItemView):
 
     min_size = QtCore.QSize(0, 0)
     default_size = QtCore.QSize(250, 150)
+    # when False, the size of each item is the sizeHint of the delegate
+    uniform_item_sizes = True
     child_rows = True
+    # when True, child rows are only fetched once their parent is visible
+    lazy_child_rows = False
     column = 0
 
     def __init__(self, parent: QtWidgets.QWidget | None = None) -> None:
         super().__init__(parent)
 
-        self._item_rects = []
+        self._item_rects = {}
+        self._index_cache = None
+        self._expanded_indexes = set()
+        self._pending_indexes = []
+        self._item_sizes = None
+        self._lines = None
+        self._size_hints = {}
         self._rubber_origin = QtCore.QPoint()
         self._rubber_band = None
 
@@ -220,6 +528,8 @@ class FlexView(QtWidgets.QAbstractItemView):
 
     @property
     def item_rects(self) -> dict[QtCore.QModelIndex, QtCore.QRect]:
+        # NOTE: this builds the rects of all items, the view itself only
+        # calculates the rects of visible items
         if not self._item_rects:
             self._item_rects = self._update_item_rects()
         return self._item_rects
@@ -227,6 +537,8 @@ class FlexView(QtWidgets.QAbstractItemView):
     @item_rects.setter
     def item_rects(self, value: dict[QtCore.QModelIndex, QtCore.QRect]) -> None:
         self._item_rects = value
+        if not value:
+            self._lines = None
 
     def dataChanged(
         self,
@@ -236,7 +548,8 @@ class FlexView(QtWidgets.QAbstractItemView):
     ) -> None:
         if roles is None:
             roles = []
-        self.item_rects = {}
+        if not roles or any(role in SIZE_ROLES for role in roles):
+            self._update_size_hints(top_left, bottom_right)
         super().dataChanged(top_left, bottom_right, roles)
 
     def indexAt(self, point: QtCore.QPoint) -> QtCore.QModelIndex:
@@ -245,18 +558,15 @@ class FlexView(QtWidgets.QAbstractItemView):
         )
         point += offset
 
-        self.item_rects = {}
-
-        for index, rect in self.item_rects.items():
-            if rect.contains(point):
-                return index
+        rect = QtCore.QRect(point, QtCore.QSize(1, 1))
+        for position in self._positions_in_rect(rect):
+            if self._item_rect(position).contains(point):
+                return self._index(position)
         return self.rootIndex()
 
     def mousePressEvent(self, event: QtGui.QMouseEvent) -> None:
         super().mousePressEvent(event)
 
-        self.indexAt(event.pos())
-
         # rubber_band
         if event.button() == QtCore.Qt.MouseButton.LeftButton:
             if not self._rubber_band:
@@ -286,39 +596,50 @@ class FlexView(QtWidgets.QAbstractItemView):
         modifiers: QtCore.Qt.KeyboardModifier,
     ) -> QtCore.QModelIndex:
         index = self.currentIndex()
-        if index.isValid():
-            row = index.row()
-
-            min_row = 0
-            max_row = self.model().rowCount(index.parent()) - 1
-
-            if cursor_action in (
-                CursorAction.MoveLeft,
-                CursorAction.MoveUp,
-                CursorAction.MovePrevious,
-            ):
-                row -= 1
-            elif cursor_action in (
-                CursorAction.MoveRight,
-                CursorAction.MoveDown,
-                CursorAction.MoveNext,
-            ):
-                row += 1
-            elif cursor_action == CursorAction.MoveHome:
-                row = min_row
-            elif cursor_action == CursorAction.MoveEnd:
-                row = max_row
-            elif cursor_action == CursorAction.MovePageUp:
-                row -= 10
-            elif cursor_action == CursorAction.MovePageDown:
-                row += 10
-            else:
-                return index
+        position = self._position(index) if index.isValid() else None
+        if position is None:
+            return index
 
-            row = max(min_row, min(max_row, row))
+        layout_flags = self.__class__.LayoutFlags
+        wrap_flags = self.__class__.WrapFlags
 
-            index = self.model().index(row, index.column(), index.parent())
-        return index
+        # the cursor actions that move along the main and cross axis
+        if self._is_column():
+            main_actions = (CursorAction.MoveUp, CursorAction.MoveDown)
+            cross_actions = (CursorAction.MoveLeft, CursorAction.MoveRight)
+        else:
+            main_actions = (CursorAction.MoveLeft, CursorAction.MoveRight)
+            cross_actions = (CursorAction.MoveUp, CursorAction.MoveDown)
+        if self.flex_direction in (
+            layout_flags.ROW_REVERSE,
+            layout_flags.COLUMN_REVERSE,
+        ):
+            main_actions = main_actions[::-1]
+        if self.wrap == wrap_flags.WRAP_REVERSE:
+            cross_actions = cross_actions[::-1]
+
+        max_position = len(self._indexes()) - 1
+        if cursor_action in (main_actions[0], CursorAction.MovePrevious):
+            position -= 1
+        elif cursor_action in (main_actions[1], CursorAction.MoveNext):
+            position += 1
+        elif cursor_action == CursorAction.MoveHome:
+            position = 0
+        elif cursor_action == CursorAction.MoveEnd:
+            position = max_position
+        elif cursor_action == cross_actions[0]:
+            position = self._move_line(position, -1)
+        elif cursor_action == cross_actions[1]:
+            position = self._move_line(position, 1)
+        elif cursor_action == CursorAction.MovePageUp:
+            position = self._move_page(position, -1)
+        elif cursor_action == CursorAction.MovePageDown:
+            position = self._move_page(position, 1)
+        else:
+            return index
+
+        position = max(0, min(max_position, position))
+        return self._index(position)
 
     def paintEvent(self, event: QtGui.QPaintEvent) -> None:
         painter = QtGui.QPainter(self.viewport())
@@ -328,25 +649,31 @@ class FlexView(QtWidgets.QAbstractItemView):
             | QtGui.QPainter.RenderHint.TextAntialiasing
         )
 
-        option = QtWidgets.QStyleOptionViewItem()
+        option = self._view_option()
         state = option.state
         enabled = bool(state & State_Flag.State_Enabled)
         has_focus = self.hasFocus() or self.viewport().hasFocus()
-        focused = has_focus and self.currentIndex().isValid()
-
-        for index in self._indexes():
-            rect = self.item_rects.get(index)
-            if rect is None:
-                continue
+        current_index = self.currentIndex()
+        focused = has_focus and current_index.isValid()
+        selection_model = self.selectionModel()
+        offset = QtCore.QPoint(self.horizontalOffset(), self.verticalOffset())
+        event_rect = event.rect().translated(offset)
+        lazy = self.child_rows and self.lazy_child_rows
+        pending_indexes = []
+        position = -1
+
+        for position in self._positions_in_rect(event_rect):
+            index = self._index(position)
+            if lazy:
+                first_index = index.siblingAtColumn(0)
+                if not self._is_expanded(first_index) and self._has_child_rows(
+                    first_index
+                ):
+                    pending_indexes.append(QtCore.QPersistentModelIndex(first_index))
             option.state = state
-            option.rect = self._map_to_viewport(rect)
-            option.decorationAlignment = QtCore.Qt.AlignmentFlag.AlignCenter
-            option.decorationPosition = QtWidgets.QStyleOptionViewItem.Position.Top
-            option.displayAlignment = (
-                QtCore.Qt.AlignmentFlag.AlignBottom | QtCore.Qt.AlignmentFlag.AlignLeft
-            )
+            option.rect = self._map_to_viewport(self._item_rect(position))
 
-            if self.selectionModel().isSelected(index):
+            if selection_model.isSelected(index):
                 option.state |= State_Flag.State_Selected
             if enabled:
                 if self.model().flags(index) and QtCore.Qt.ItemFlag.ItemIsEnabled:
@@ -355,42 +682,82 @@ class FlexView(QtWidgets.QAbstractItemView):
                     option.state = option.state and ~State_Flag.State_Enabled
                     current_color_group = QtGui.QPalette.ColorGroup.Disabled
                 option.palette.setCurrentColorGroup(current_color_group)
-            if focused and self.currentIndex() == index:
+            if focused and current_index == index:
                 option.state |= State_Flag.State_HasFocus
                 if self.state() == QtWidgets.QAbstractItemView.State.EditingState:
                     option.state |= State_Flag.State_Editing
             self.itemDelegate(index).paint(painter, option, index)
 
+        # fetch the child rows of visible items and more rows at the end
+        root_index = self.rootIndex()
+        if position == len(self._indexes()) - 1 and self.model().canFetchMore(
+            root_index
+        ):
+            pending_indexes.append(QtCore.QPersistentModelIndex(root_index))
+        if pending_indexes and not self._pending_indexes:
+            QtCore.QTimer.singleShot(0, self._fetch_pending)
+        self._pending_indexes.extend(pending_indexes)
+
+    def reset(self) -> None:
+        self._index_cache = None
+        self._expanded_indexes = set()
+        self._invalidate_layout(sizes=True)
+        super().reset()
+
     def resizeEvent(self, event: QtGui.QResizeEvent) -> None:
-        self.item_rects = {}
+        self._invalidate_layout()
         super().resizeEvent(event)
 
     def rowsAboutToBeRemoved(
         self, parent: QtCore.QModelIndex, start: int, end: int
     ) -> None:
-        self.item_rects = {}
+        self._remove_cached_rows(parent, start, end)
+        self._invalidate_layout(sizes=True)
         super().rowsAboutToBeRemoved(parent, start, end)
 
     def rowsInserted(self, parent: QtCore.QModelIndex, start: int, end: int) -> None:
-        self.item_rects = {}
+        self._insert_cached_rows(parent, start, end)
+        self._invalidate_layout(sizes=True)
         super().rowsInserted(parent, start, end)
 
     def setModel(self, model: QtCore.QAbstractItemModel) -> None:
-        self.item_rects = {}
+        previous_model = self.model()
+        if previous_model:
+            previous_model.rowsAboutToBeMoved.disconnect(self._rows_about_to_be_moved)
+            previous_model.rowsMoved.disconnect(self._rows_moved)
+            previous_model.layoutChanged.disconnect(self._layout_changed)
+
+        self._index_cache = None
+        self._expanded_indexes = set()
+        self._size_hints = {}
+        self._invalidate_layout(sizes=True)
         super().setModel(model)
 
+        if model:
+            model.rowsAboutToBeMoved.connect(self._rows_about_to_be_moved)
+            model.rowsMoved.connect(self._rows_moved)
+            model.layoutChanged.connect(self._layout_changed)
+
+    def setRootIndex(self, index: QtCore.QModelIndex) -> None:
+        self._index_cache = None
+        self._invalidate_layout(sizes=True)
+        super().setRootIndex(index)
+
     def scrollTo(
         self,
         index: QtCore.QModelIndex,
         hint: ScrollHint = ScrollHint.EnsureVisible,
     ) -> None:
-        if index.parent() != self.rootIndex():
-            return
-
         if not index.isValid():
             return
 
-        rect = self.item_rects[index]
+        position = self._position(index)
+        if position is None and self.child_rows and self.lazy_child_rows:
+            self._fetch_ancestors(index)
+            position = self._position(index)
+        if position is None:
+            return
+        rect = self._item_rect(position)
         mapped_rect = self._map_to_viewport(rect)
 
         if hint == ScrollHint.EnsureVisible and self.viewport().rect().contains(
@@ -424,12 +791,10 @@ class FlexView(QtWidgets.QAbstractItemView):
         rect = rect.translated(self.horizontalOffset(), self.verticalOffset())
         rect = rect.normalized()
 
-        update_rect = QtCore.QRect()
         selection = QtCore.QItemSelection()
-        for index, item_rect in self.item_rects.items():
-            if item_rect.intersects(rect):
-                update_rect = update_rect.united(item_rect)
-                selection.select(index, index)
+        for position in self._positions_in_rect(rect):
+            index = self._index(position)
+            selection.select(index, index)
         self.selectionModel().select(selection, command)
 
     def update(self, index: QtCore.QModelIndex | None = None) -> None:
@@ -441,10 +806,11 @@ class FlexView(QtWidgets.QAbstractItemView):
         super().updateGeometries()
 
     def visualRect(self, index: QtCore.QModelIndex) -> QtCore.QRect:
-        if index.isValid():
-            rect = self.item_rects[index]
-        else:
+        position = self._position(index) if index.isValid() else None
+        if position is None:
             rect = QtCore.QRect()
+        else:
+            rect = self._item_rect(position)
         return self._map_to_viewport(rect)
 
     def visualRegionForSelection(
@@ -453,26 +819,205 @@ class FlexView(QtWidgets.QAbstractItemView):
         region = QtGui.QRegion()
 
         for index in selection.indexes():
-            rect = self.item_rects[index]
-            region = region.united(self._map_to_viewport(rect))
+            region = region.united(self.visualRect(index))
 
         return region
 
-    def _indexes(
-        self, parent: QtCore.QModelIndex | None = None
-    ) -> tuple[QtCore.QModelIndex, ...]:
-        if parent is None:
-            parent = self.rootIndex()
+    def _indexes(self) -> list[QtCore.QPersistentModelIndex]:
+        # flattened list of all indexes in depth-first order, kept up to date
+        # incrementally through the model signals
+        if self._index_cache is None:
+            self._index_cache = self._collect_indexes(self.rootIndex())
+        return self._index_cache
+
+    def _collect_indexes(
+        self, parent: QtCore.QModelIndex, start: int = 0, end: int | None = None
+    ) -> list[QtCore.QPersistentModelIndex]:
+        model = self.model()
+        if not model:
+            return []
+        if end is None:
+            end = model.rowCount(parent) - 1
+
         indexes = []
-        for row in range(self.model().rowCount(parent)):
-            index = self.model().index(row, self.column, parent)
-            if index.data():  # TODO: temporary
-                indexes.append(index)
+        for row in range(start, end + 1):
+            index = model.index(row, self.column, parent)
+            if index.isValid():
+                indexes.append(QtCore.QPersistentModelIndex(index))
             if self.child_rows:
-                first_index = index.siblingAtColumn(0)
-                if first_index.isValid():
-                    indexes.extend(self._indexes(first_index))
-        return tuple(indexes)
+                first_index = model.index(row, 0, parent)
+                if first_index.isValid() and self._is_expanded(first_index):
+                    indexes.extend(self._collect_indexes(first_index))
+        return indexes
+
+    def _index_path(self, index: QtCore.QModelIndex) -> tuple[int, ...] | None:
+        # the path of rows from the root index, cached indexes are sorted by path
+        root_index = self.rootIndex()
+        path = []
+        while index.isValid():
+            if index == root_index:
+                break
+            path.append(index.row())
+            index = index.parent()
+        else:
+            if root_index.isValid():
+                return None
+        path.reverse()
+        return tuple(path)
+
+    def _find_cached_position(self, path: tuple[int, ...]) -> int:
+        indexes = self._index_cache
+        low = 0
+        high = len(indexes)
+        while low < high:
+            middle = (low + high) // 2
+            middle_path = self._index_path(indexes[middle])
+            if middle_path is not None and middle_path < path:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _is_cached_parent(self, parent: QtCore.QModelIndex) -> bool:
+        root_index = self.rootIndex()
+        if parent == root_index:
+            return True
+        if not self.child_rows or self._index_path(parent) is None:
+            return False
+        # with lazy child rows all ancestors need to be expanded
+        while parent.isValid() and parent != root_index:
+            if not self._is_expanded(parent.siblingAtColumn(0)):
+                return False
+            parent = parent.parent()
+        return True
+
+    def _is_expanded(self, index: QtCore.QModelIndex) -> bool:
+        if not self.lazy_child_rows:
+            return True
+        return QtCore.QPersistentModelIndex(index) in self._expanded_indexes
+
+    def _fetch_child_rows(self, index: QtCore.QModelIndex) -> None:
+        # expand the child rows of index into the cached indexes
+        model = self.model()
+        if self._is_expanded(index):
+            return
+        self._expanded_indexes.add(QtCore.QPersistentModelIndex(index))
+        if self._index_cache is None or not self._is_cached_parent(index):
+            return
+
+        row_count = model.rowCount(index)
+        if row_count:
+            self._insert_cached_rows(index, 0, row_count - 1)
+            self._invalidate_layout(sizes=True)
+        if model.canFetchMore(index):
+            model.fetchMore(index)
+
+    def _fetch_ancestors(self, index: QtCore.QModelIndex) -> None:
+        root_index = self.rootIndex()
+        ancestors = []
+        parent = index.parent()
+        while parent.isValid() and parent != root_index:
+            ancestors.append(parent.siblingAtColumn(0))
+            parent = parent.parent()
+        for ancestor in reversed(ancestors):
+            self._fetch_child_rows(ancestor)
+
+    def _fetch_pending(self) -> None:
+        model = self.model()
+        indexes = self._pending_indexes
+        self._pending_indexes = []
+        if not model:
+            return
+
+        # child rows are inserted after their parent and push the following items
+        # down, parents are only fetched while they are still in the viewport
+        rect = self.viewport().rect()
+        rect.translate(self.horizontalOffset(), self.verticalOffset())
+        last_position = max(self._positions_in_rect(rect), default=-1)
+
+        root_index = self.rootIndex()
+        for index in indexes:
+            if index == root_index:
+                if model.canFetchMore(root_index):
+                    model.fetchMore(root_index)
+            elif index.isValid():
+                index = index.sibling(index.row(), index.column())
+                position = self._position(index.siblingAtColumn(self.column))
+                if position is None or position > last_position:
+                    continue
+                self._fetch_child_rows(index)
+        self.updateGeometries()
+        self.viewport().update()
+
+    def _has_child_rows(self, index: QtCore.QModelIndex) -> bool:
+        model = self.model()
+        return model.rowCount(index) > 0 or model.canFetchMore(index)
+
+    def _insert_cached_rows(
+        self, parent: QtCore.QModelIndex, start: int, end: int
+    ) -> None:
+        if self._index_cache is None or not self._is_cached_parent(parent):
+            return
+        position = self._find_cached_position(self._index_path(parent) + (start,))
+        self._index_cache[position:position] = self._collect_indexes(parent, start, end)
+
+    def _remove_cached_rows(
+        self, parent: QtCore.QModelIndex, start: int, end: int
+    ) -> None:
+        if self._index_cache is None or not self._is_cached_parent(parent):
+            return
+        path = self._index_path(parent)
+        first = self._find_cached_position(path + (start,))
+        last = self._find_cached_position(path + (end + 1,))
+        del self._index_cache[first:last]
+
+    def _layout_changed(self) -> None:
+        self._index_cache = None
+        self.item_rects = {}
+
+    def _rows_about_to_be_moved(
+        self,
+        parent: QtCore.QModelIndex,
+        start: int,
+        end: int,
+        destination: QtCore.QModelIndex,
+        row: int,
+    ) -> None:
+        self._remove_cached_rows(parent, start, end)
+
+    def _rows_moved(
+        self,
+        parent: QtCore.QModelIndex,
+        start: int,
+        end: int,
+        destination: QtCore.QModelIndex,
+        row: int,
+    ) -> None:
+        if parent == destination and row > end:
+            row -= end - start + 1
+        self._insert_cached_rows(destination, row, row + end - start)
+        self.item_rects = {}
+        self.viewport().update()
+
+    def _index(self, position: int) -> QtCore.QModelIndex:
+        index = self._indexes()[position]
+        return index.sibling(index.row(), index.column())
+
+    def _position(self, index: QtCore.QModelIndex) -> int | None:
+        indexes = self._indexes()
+
+        # in flat models the position is the row
+        row = index.row()
+        if 0 <= row < len(indexes) and indexes[row] == index:
+            return row
+
+        path = self._index_path(index)
+        if path is None:
+            return None
+        position = self._find_cached_position(path)
+        if position < len(indexes) and indexes[position] == index:
+            return position
+        return None
 
     def _horizontal_scroll_to_value(self, rect: QtCore.QRect, hint: ScrollHint) -> int:
         if hint == ScrollHint.PositionAtBottom:
@@ -513,125 +1058,323 @@ class FlexView(QtWidgets.QAbstractItemView):
         rect = result.adjusted(dx, dy, dx, dy)
         return rect
 
-    def _update_item_rects(self) -> dict[QtCore.QModelIndex, QtCore.QRect]:
-        if not self.model():
-            return {}
+    def _invalidate_layout(self, sizes: bool = False) -> None:
+        self._item_rects = {}
+        self._lines = None
+        if sizes:
+            self._item_sizes = None
+
+    def _flex_size(self, size: QtCore.QSize) -> tuple[int, int]:
+        # the size along the main and cross axis
+        if self._is_column():
+            return size.height(), size.width()
+        return size.width(), size.height()
+
+    def _is_column(self) -> bool:
+        layout_flags = self.__class__.LayoutFlags
+        return self.flex_direction in (layout_flags.COLUMN, layout_flags.COLUMN_REVERSE)
+
+    def _item_rect(self, position: int) -> QtCore.QRect:
+        # the rect of an item in contents coordinates
+        position_flags = self.__class__.PositionFlags
+
+        lines = self._layout()
+        line = self._line_index(position)
+        main, main_size = self._item_main(line, position)
+        cross_size = self._sizes().item(position)[1]
+
+        cross = lines.positions[line]
+        line_size = lines.sizes[line]
+        if self.align_items == position_flags.END:
+            cross += line_size - cross_size
+        elif self.align_items == position_flags.CENTER:
+            cross += (line_size - cross_size) / 2
+        elif self.align_items == position_flags.STRETCH:
+            cross_size = line_size
+
+        return self._map_from_flex(main, cross, main_size, cross_size)
+
+    def _item_main(self, line: int, position: int) -> tuple[int, int]:
+        # the position and size of an item along the main axis of its line, the
+        # edges are rounded before the axis is reversed so that items and the
+        # search in _positions_in_rect cover the same pixels in every direction
+        lines = self._layout()
+        sizes = self._sizes()
+        start = lines.starts[line]
+        grow = lines.grows[line]
+        main = lines.offsets[line] + sizes.advance(start, position)
+        main += (position - start) * (lines.gaps[line] + grow)
+        main_end = main + sizes.item(position)[0] + grow
+        return int(main), int(main_end) - int(main)
+
+    def _item_size(self, index: QtCore.QPersistentModelIndex) -> QtCore.QSize:
+        size = self._size_hints.get(index)
+        if size is None:
+            model_index = index.sibling(index.row(), index.column())
+            delegate = self.itemDelegate(model_index)
+            size = delegate.sizeHint(self._view_option(), model_index)
+            if size.isEmpty():
+                size = self.default_size
+            size = size.expandedTo(self.min_size)
+            self._size_hints[index] = size
+        return size
+
+    def _layout(self) -> _FlexLines:
+        # break the items into lines, each line is positioned with the prefix sums
+        # of the item sizes so only the lines need to be iterated
+        viewport_size = self.viewport().size()
+        if self._lines is not None and self._lines.viewport_size == viewport_size:
+            return self._lines
 
         position_flags = self.__class__.PositionFlags
         wrap_flags = self.__class__.WrapFlags
 
-        default_size = self.default_size
-        rect = self.viewport().rect()
-        rect = rect.marginsRemoved(self.contents_margins)
-        x = rect.x()
-        y = rect.y()
-        max_height = 0
-        group_width = 0
+        rect = self.viewport().rect().marginsRemoved(self.contents_margins)
+        available = rect.height() if self._is_column() else rect.width()
         spacing = self.spacing
-        item_rects = {}
-        min_item_width = 0
-        previous_item_width = default_size.width()
-
-        indexes = self._indexes()
-        group_indexes = []
-        for i, index in enumerate(indexes):
-            group_indexes.append(index)
-            max_height = max(max_height, default_size.height())
-            next_x = x + default_size.width() + spacing
-            group_width += default_size.width() + spacing
-            x = next_x
-
-            try:
-                # next_next_x = next_x + items[i + 1].sizeHint().width()
-                next_next_x = next_x + default_size.width()
-            except IndexError:
-                next_next_x = next_x - spacing
-
-            is_last_item = i == len(indexes) - 1
-            is_overlapped = next_next_x > rect.right()
-
-            if self.wrap == wrap_flags.WRAP:
-                end_group = is_overlapped or is_last_item
+        sizes = self._sizes()
+        count = len(sizes)
+
+        lines = _FlexLines(available=available, viewport_size=viewport_size)
+        cross = 0
+        grow = 0
+        start = 0
+        while start < count:
+            if self.wrap == wrap_flags.NONE:
+                end = count
             else:
-                end_group = True
-
-            if end_group:
-                count = len(group_indexes)
-                item_spacing = spacing
-                group_width -= spacing
-
-                # x position
-                if self.justify_content == position_flags.START or self.grow:
-                    item_x = rect.x()
-                elif self.justify_content == position_flags.END:
-                    item_x = rect.right() - group_width
-                elif self.justify_content == position_flags.CENTER:
-                    total_space = rect.width() - group_width
-                    item_x = rect.x() + total_space / 2
-                elif self.justify_content == position_flags.SPACE_BETWEEN:
-                    total_space = rect.width() - group_width + (count - 1) * spacing
-                    item_x = rect.x()
-                    item_spacing = total_space / max(1, count - 1)
-                else:
-                    item_x = rect.x()
-
-                item_width = (rect.width() - (count - 1) * spacing) / count
-                for group_index in group_indexes:
-                    # size = group_item.sizeHint()
-                    size = default_size
-                    item_height = size.height()
-
-                    # y position
-                    if self.align_items == position_flags.START:
-                        item_y = y
-                    elif self.align_items == position_flags.END:
-                        item_y = y + max_height - size.height()
-                    elif self.align_items == position_flags.CENTER:
-                        item_y = y + (max_height - size.height()) / 2
-                    elif self.align_items == position_flags.STRETCH:
-                        item_y = y
-                        item_height = max_height
-                    else:
-                        item_y = y
-
-                    # size
-                    if self.grow:
-                        if is_last_item:
-                            item_width = previous_item_width
-                        else:
-                            previous_item_width = item_width
-                    else:
-                        item_width = size.width()
-
-                    item_rect = QtCore.QRect(
-                        QtCore.QPoint(item_x, item_y),
-                        QtCore.QSize(item_width, item_height),
-                    )
-
-                    min_item_width = max(item_rect.width(), min_item_width)
-                    item_rects[group_index] = item_rect
-                    item_x += item_width + item_spacing
-
-                x = rect.x()
-                y = y + max_height + spacing
-
-                max_height = 0
-                group_indexes = []
-                group_width = 0
-
-        rect.setBottom(y - spacing)
-        rect = rect.marginsAdded(self.contents_margins)
-        self.height = rect.height()
-        self.min_item_width = (
-            min_item_width
-            + self.contents_margins.left()
-            + self.contents_margins.right()
+                end = max(start + 1, sizes.search(start, available + spacing))
+            items = end - start
+            main_extent = sizes.advance(start, end) - spacing
+            free_space = max(0, available - main_extent)
+            is_last_line = end == count
+
+            offset = 0
+            gap = 0
+            if self.grow:
+                # the last line keeps the item size of the previous line
+                if not is_last_line:
+                    grow = free_space / items
+                main_extent += grow * items
+            elif self.justify_content == position_flags.END:
+                offset = free_space
+            elif self.justify_content == position_flags.CENTER:
+                offset = free_space / 2
+            elif self.justify_content == position_flags.SPACE_BETWEEN:
+                if items > 1:
+                    gap = free_space / (items - 1)
+
+            line_size = sizes.maximum(start, end)
+            lines.starts.append(start)
+            lines.positions.append(cross)
+            lines.sizes.append(line_size)
+            lines.offsets.append(offset)
+            lines.gaps.append(gap)
+            lines.grows.append(grow if self.grow else 0)
+            lines.main_extent = max(lines.main_extent, int(main_extent))
+
+            cross += line_size + spacing
+            start = end
+
+        lines.cross_extent = max(0, cross - spacing)
+        self._lines = lines
+        return lines
+
+    def _line_index(self, position: int) -> int:
+        starts = self._layout().starts
+        if self.uniform_item_sizes and len(starts) > 1:
+            # all lines except the last one hold the same number of items
+            return min(position // starts[1], len(starts) - 1)
+        return bisect.bisect_right(starts, position) - 1
+
+    def _map_from_flex(
+        self, main: float, cross: float, main_size: float, cross_size: float
+    ) -> QtCore.QRect:
+        # map a rect from the main and cross axis to contents coordinates
+        main_extent, cross_extent = self._reversed_extents()
+        if main_extent is not None:
+            main = main_extent - main - main_size
+        if cross_extent is not None:
+            cross = cross_extent - cross - cross_size
+
+        margins = self.contents_margins
+        if self._is_column():
+            x, y, width, height = cross, main, cross_size, main_size
+        else:
+            x, y, width, height = main, cross, main_size, cross_size
+        return QtCore.QRect(
+            int(margins.left() + x), int(margins.top() + y), int(width), int(height)
         )
 
+    def _map_to_flex(self, rect: QtCore.QRect) -> tuple[int, int, int, int]:
+        # map a rect from contents coordinates to the ranges on the main and cross
+        # axis, the ranges are grown by a pixel to account for rounding
+        margins = self.contents_margins
+        rect = rect.translated(-margins.left(), -margins.top())
+        if self._is_column():
+            main_start, main_end = rect.top() - 1, rect.bottom() + 1
+            cross_start, cross_end = rect.left() - 1, rect.right() + 1
+        else:
+            main_start, main_end = rect.left() - 1, rect.right() + 1
+            cross_start, cross_end = rect.top() - 1, rect.bottom() + 1
+
+        main_extent, cross_extent = self._reversed_extents()
+        if main_extent is not None:
+            main_start, main_end = main_extent - main_end, main_extent - main_start
+        if cross_extent is not None:
+            cross_start, cross_end = (
+                cross_extent - cross_end,
+                cross_extent - cross_start,
+            )
+        return main_start, main_end, cross_start, cross_end
+
+    def _move_line(self, position: int, lines: int) -> int:
+        # the item in another line that is closest on the main axis
+        line = self._line_index(position)
+        target_line = max(0, min(len(self._layout().starts) - 1, line + lines))
+        if target_line == line:
+            return position
+
+        main, main_size = self._item_main(line, position)
+        return self._line_position_at(target_line, main + main_size / 2)
+
+    def _move_page(self, position: int, direction: int) -> int:
+        # move by the size of the viewport along the cross axis
+        lines = self._layout()
+        viewport = self.viewport()
+        page = viewport.width() if self._is_column() else viewport.height()
+
+        if self.wrap == self.__class__.WrapFlags.WRAP_REVERSE:
+            direction = -direction
+
+        line = self._line_index(position)
+        cross = lines.positions[line] + direction * page
+        target_line = max(0, bisect.bisect_right(lines.positions, cross) - 1)
+        if target_line == line:
+            # lines larger than the viewport still move by one line
+            target_line += direction
+        return self._move_line(position, target_line - line)
+
+    def _line_position_at(self, line: int, main: float) -> int:
+        # the item in a line at main, or the closest one
+        lines = self._layout()
+        start = lines.starts[line]
+        if line + 1 < len(lines.starts):
+            end = lines.starts[line + 1]
+        else:
+            end = len(self._sizes())
+        position = self._find_line_position(line, start, end, int(main))
+        return min(position, end - 1)
+
+    def _positions_in_rect(self, rect: QtCore.QRect) -> Iterator[int]:
+        # the positions of the items that intersect with rect in contents
+        # coordinates, only the visible lines and items are iterated
+        lines = self._layout()
+        if not lines.starts:
+            return
+
+        main_start, main_end, cross_start, cross_end = self._map_to_flex(rect)
+
+        count = len(self._sizes())
+        first_line = max(0, bisect.bisect_right(lines.positions, cross_start) - 1)
+        for line in range(first_line, len(lines.starts)):
+            if lines.positions[line] > cross_end:
+                break
+            if lines.positions[line] + lines.sizes[line] < cross_start:
+                continue
+            start = lines.starts[line]
+            end = lines.starts[line + 1] if line + 1 < len(lines.starts) else count
+            position = self._find_line_position(line, start, end, main_start)
+            for position in range(position, end):
+                if self._item_main(line, position)[0] > main_end:
+                    break
+                if self._item_rect(position).intersects(rect):
+                    yield position
+
+    def _find_line_position(self, line: int, start: int, end: int, main: int) -> int:
+        # the first item in the line that ends after main
+        low = start
+        high = end
+        while low < high:
+            middle = (low + high) // 2
+            middle_main, middle_size = self._item_main(line, middle)
+            if middle_main + middle_size <= main:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _reversed_extents(self) -> tuple[int | None, int | None]:
+        # the extents that the reversed main and cross axis are mirrored in,
+        # None for axes that aren't reversed
+        layout_flags = self.__class__.LayoutFlags
+        lines = self._layout()
+        main_extent = cross_extent = None
+        if self.flex_direction in (
+            layout_flags.ROW_REVERSE,
+            layout_flags.COLUMN_REVERSE,
+        ):
+            main_extent = max(lines.available, lines.main_extent)
+        if self.wrap == self.__class__.WrapFlags.WRAP_REVERSE:
+            cross_extent = lines.cross_extent
+        return main_extent, cross_extent
+
+    def _sizes(self) -> _SizeTree | _UniformSizes:
+        if self._item_sizes is None:
+            indexes = self._indexes()
+            if self.uniform_item_sizes:
+                main, cross = self._flex_size(self.default_size)
+                self._item_sizes = _UniformSizes(
+                    len(indexes), main, cross, self.spacing
+                )
+            else:
+                sizes = []
+                for index in indexes:
+                    size = self._item_size(index)
+                    sizes.append(self._flex_size(size))
+                self._item_sizes = _SizeTree(sizes, self.spacing)
+        return self._item_sizes
+
+    def _update_item_rects(self) -> dict[QtCore.QModelIndex, QtCore.QRect]:
+        if not self.model():
+            return {}
+        item_rects = {}
+        for position in range(len(self._indexes())):
+            item_rects[self._index(position)] = self._item_rect(position)
         return item_rects
 
+    def _update_size_hints(
+        self, top_left: QtCore.QModelIndex, bottom_right: QtCore.QModelIndex
+    ) -> None:
+        if self.uniform_item_sizes or self._index_cache is None:
+            return
+        if not top_left.column() <= self.column <= bottom_right.column():
+            return
+
+        model = self.model()
+        parent = top_left.parent()
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            index = model.index(row, self.column, parent)
+            persistent_index = QtCore.QPersistentModelIndex(index)
+            self._size_hints.pop(persistent_index, None)
+            if self._item_sizes is None:
+                continue
+            position = self._position(index)
+            if position is not None:
+                size = self._item_size(persistent_index)
+                self._item_sizes.update(position, *self._flex_size(size))
+        self._invalidate_layout()
+
     def _update_scrollbars(self) -> None:
-        self._update_item_rects()
+        lines = self._layout()
+        main_extent = max(lines.available, lines.main_extent)
+        if self._is_column():
+            width, height = lines.cross_extent, main_extent
+        else:
+            width, height = main_extent, lines.cross_extent
+        margins = self.contents_margins
+        self.height = height + margins.top() + margins.bottom()
+        self.min_item_width = width + margins.left() + margins.right()
 
         viewport = self.viewport()
 
@@ -640,3 +1383,12 @@ class FlexView(QtWidgets.QAbstractItemView):
 
         self.horizontalScrollBar().setPageStep(viewport.width())
         self.horizontalScrollBar().setRange(0, self.min_item_width - viewport.width())
+
+    def _view_option(self) -> QtWidgets.QStyleOptionViewItem:
+        option = QtWidgets.QStyleOptionViewItem()
+        option.decorationAlignment = QtCore.Qt.AlignmentFlag.AlignCenter
+        option.decorationPosition = QtWidgets.QStyleOptionViewItem.Position.Top
+        option.displayAlignment = (
+            QtCore.Qt.AlignmentFlag.AlignBottom | QtCore.Qt.AlignmentFlag.AlignLeft
+        )
+        return option
@@ -10,34 +10,77 @@ def title(text: str) -> str:
     return text
 
 
+class NameAllocator:
+    # names are compared casefolded, the next free number is remembered per stem
+    # so that allocating a batch of names doesn't rescan the existing names
+
+    def __init__(self, existing_names: Iterable[str] = ()) -> None:
+        self._names = {name.casefold() for name in existing_names}
+        self._numbers: dict[tuple[str, int], int] = {}
+
+    def add(self, name: str) -> None:
+        self._names.add(name.casefold())
+
+    def allocate(self, name: str) -> str:
+        if name.casefold() not in self._names:
+            self.add(name)
+            return name
+
+        match = re.search(r'(.*?)(\d+)$', name)
+        if match:
+            stem = match.group(1)
+            start = int(match.group(2)) + 1
+        else:
+            stem = name
+            start = 1
+
+        # all numbers between start and the remembered number are taken
+        key = (stem.casefold(), start)
+        number = self._numbers.get(key, start)
+        while f'{stem}{number}'.casefold() in self._names:
+            number += 1
+        self._numbers[key] = number + 1
+
+        name = f'{stem}{number}'
+        self.add(name)
+        return name
+
+
+class PathAllocator:
+    # directories are listed once and the names are allocated per extension
+
+    def __init__(self) -> None:
+        self._allocators: dict[tuple[str, str], NameAllocator] = {}
+        self._listed_paths: set[str] = set()
+
+    def allocate(self, path: str) -> str:
+        parent_path, basename = os.path.split(path)
+        name, ext = os.path.splitext(basename)
+        if parent_path not in self._listed_paths:
+            self._list(parent_path)
+
+        allocator = self._allocators.setdefault((parent_path, ext), NameAllocator())
+        basename = allocator.allocate(name) + ext
+        return os.path.join(parent_path, basename)
+
+    def _list(self, parent_path: str) -> None:
+        self._listed_paths.add(parent_path)
+        try:
+            items = os.listdir(parent_path)
+        except OSError:
+            return
+        for item in items:
+            item_name, item_ext = os.path.splitext(item)
+            allocator = self._allocators.get((parent_path, item_ext))
+            if allocator is None:
+                allocator = NameAllocator()
+                self._allocators[(parent_path, item_ext)] = allocator
+            allocator.add(item_name)
+
+
 def unique_name(name: str, existing_names: Iterable[str]) -> str:
-    for existing_name in existing_names:
-        if name.casefold() == existing_name.casefold():
-            match = re.search(r'(.*?)(\d+)$', name)
-            if match:
-                number = int(match.group(2))
-                name = match.group(1)
-            else:
-                number = 0
-            name = f'{name}{number + 1}'
-            return unique_name(name, existing_names)
-    return name
+    return NameAllocator(existing_names).allocate(name)
 
 
 def unique_path(path: str) -> str:
-    parent_path = os.path.dirname(path)
-    try:
-        items = os.listdir(parent_path)
-    except OSError:
-        return path
-
-    basename = os.path.basename(path)
-    name, ext = os.path.splitext(basename)
-    names = []
-    for item in items:
-        item_name, item_ext = os.path.splitext(item)
-        if ext == item_ext:
-            names.append(item_name)
-    basename = unique_name(name, names) + ext
-    path = os.path.join(parent_path, basename)
-    return path
+    return PathAllocator().allocate(path)
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from qtpy import QtWidgets  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def qapp() -> QtWidgets.QApplication:
+    app = QtWidgets.QApplication.instance()
+    if app is None:
+        app = QtWidgets.QApplication([])
+    return app
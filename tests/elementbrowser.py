@@ -0,0 +1,426 @@
+from __future__ import annotations
+
+import dataclasses
+import random
+
+import pytest
+from qtpy import QtCore
+
+from qt_extensions.elementbrowser import (
+    CompactElementModel,
+    ElementBrowser,
+    ElementModel,
+    Field,
+    FieldChange,
+)
+
+
+@dataclasses.dataclass
+class Item:
+    name: str
+    path: str
+
+
+@pytest.fixture(params=[False, True], ids=['standard', 'compact'])
+def browser(request, qapp) -> ElementBrowser:
+    class Browser(ElementBrowser):
+        compact_model = request.param
+
+    return Browser((Field('name'), Field('path')))
+
+
+def row_indexes(model, index) -> list[QtCore.QModelIndex]:
+    # views drag all columns of the selected rows
+    return [index.siblingAtColumn(column) for column in range(model.columnCount())]
+
+
+def names(model, indexes) -> list[str]:
+    return [model.element(index).name for index in indexes]
+
+
+def test_find_indexes(browser) -> None:
+    model = browser.model
+    group = model.append_element(Item('group', '/group'))
+    items = [Item(f'item{i % 3}', f'/group/{i}') for i in range(6)]
+    for item in items:
+        model.append_element(item, parent=group, no_children=True)
+
+    indexes = model.find_indexes('item1', Field('name'))
+    assert [model.element(index).path for index in indexes] == [
+        '/group/1',
+        '/group/4',
+    ]
+    assert model.find_indexes(items[4]) == (indexes[1],)
+
+    # the index follows edits and removals
+    model.setData(indexes[0], 'renamed')
+    assert names(model, model.find_indexes('renamed', Field('name'))) == ['renamed']
+    assert len(model.find_indexes('item1', Field('name'))) == 1
+
+    model.remove_indexes(model.find_indexes('item2', Field('name')))
+    assert model.find_indexes('item2', Field('name')) == ()
+    assert len(model.find_indexes('item0', Field('name'))) == 2
+
+
+def test_find_indexes_after_drop(browser) -> None:
+    model = browser.model
+    source = model.append_element(Item('source', '/source'))
+    target = model.append_element(Item('target', '/target'))
+    child = Item('child', '/source/child')
+    model.append_element(child, parent=source, no_children=True)
+
+    # groups are dropped with their children
+    data = model.mimeData(row_indexes(model, source))
+    model.dropMimeData(data, QtCore.Qt.MoveAction, 0, 0, target)
+    model.removeRow(source.row())
+
+    target = model.find_indexes(Item('target', '/target'))[0]
+    indexes = model.find_indexes(child)
+    assert indexes == (model.index(0, 0, model.index(0, 0, target)),)
+    assert model.find_indexes('child', Field('name')) == indexes
+
+    browser.select_elements([child])
+    assert browser.selected_elements() == (child,)
+
+
+def test_remove_indexes(browser) -> None:
+    model = browser.model
+    groups = [model.append_element(Item(f'group{i}', f'/{i}')) for i in range(3)]
+    for i, group in enumerate(groups):
+        for j in range(5):
+            model.append_element(Item(f'item{i}{j}', f'/{i}/{j}'), parent=group)
+
+    removed = []
+    model.element_removed.connect(lambda element: removed.append(element.name))
+
+    indexes = [model.index(row, 0, groups[0]) for row in (0, 1, 3)]
+    # a group is removed together with one of its children
+    indexes.append(groups[1])
+    indexes.append(model.index(2, 0, groups[1]))
+    model.remove_indexes(indexes)
+
+    # children removed with their group are not reported separately
+    assert sorted(removed) == ['group1', 'item00', 'item01', 'item03']
+    assert names(model, [model.index(row, 0) for row in range(2)]) == [
+        'group0',
+        'group2',
+    ]
+    group = model.index(0, 0)
+    assert names(model, [model.index(row, 0, group) for row in range(2)]) == [
+        'item02',
+        'item04',
+    ]
+
+
+def test_append_elements_inserts_complete_rows(browser) -> None:
+    model = browser.model
+    group = model.append_element(Item('group', '/group'))
+    children = model.append_elements(
+        [Item(f'item{i}', f'/group/{i}') for i in range(2)], parent=group
+    )
+    child = QtCore.QPersistentModelIndex(children[1])
+
+    inserting = []
+    model.rowsAboutToBeInserted.connect(
+        lambda parent, first, last: inserting.append((first, last))
+    )
+    inserted = []
+    model.rowsInserted.connect(
+        lambda parent, first, last: inserted.append(
+            [model.index(row, 1, parent).data() for row in range(first, last + 1)]
+        )
+    )
+    layout_changes = []
+    model.layoutChanged.connect(lambda: layout_changes.append(True))
+
+    items = [Item(f'item{i}', f'/group/{i}') for i in range(2, 5)]
+    indexes = model.append_elements(items, parent=group)
+    assert inserting == [(2, 4)]
+    assert inserted == [['/group/2', '/group/3', '/group/4']]
+    assert not layout_changes
+
+    assert names(model, indexes) == ['item2', 'item3', 'item4']
+    assert model.find_indexes(items[1]) == (indexes[1],)
+    assert child.row() == 1
+    assert child.data(QtCore.Qt.UserRole).name == 'item1'
+
+
+def test_compact_model_matches_standard_model(qapp) -> None:
+    fields = (Field('name'), Field('path'))
+    models = [ElementModel(fields), CompactElementModel(fields)]
+    for model in models:
+        group = model.append_element(Item('group', '/group'))
+        model.append_elements(
+            [Item(f'item{i}', f'/group/{i}') for i in range(3)],
+            parent=group,
+            no_children=True,
+        )
+        model.append_element(Item('fixed', '/fixed'), movable=False)
+        model.setData(model.index(1, 0, group), 'renamed')
+
+    def rows(model, parent=QtCore.QModelIndex()) -> list:
+        result = []
+        for row in range(model.rowCount(parent)):
+            index = model.index(row, 0, parent)
+            result.append(model.element(index))
+            for column in range(model.columnCount(parent)):
+                cell = index.siblingAtColumn(column)
+                result.append((cell.data(), cell.data(QtCore.Qt.EditRole)))
+            result.append(rows(model, index))
+        return result
+
+    assert rows(models[1]) == rows(models[0])
+
+
+def test_field_changed(browser) -> None:
+    @dataclasses.dataclass
+    class Tagged:
+        name: str
+        path: str
+        tags: list = dataclasses.field(default_factory=list)
+
+    model = browser.model
+    element = Tagged('item', '/item', ['tag'])
+    index = model.append_element(element)
+
+    changes = []
+    model.field_changed.connect(lambda element, change: changes.append(change))
+    previous_elements = []
+    model.element_changed.connect(
+        lambda element, previous: previous_elements.append(previous)
+    )
+
+    model.setData(index.siblingAtColumn(1), '/renamed')
+    assert changes == [FieldChange('path', '/item', '/renamed')]
+    assert model.element(index).path == '/renamed'
+
+    # the previous element is a shallow copy
+    previous = previous_elements[-1]
+    assert previous is not model.element(index)
+    assert previous.path == '/item'
+    assert previous.tags is element.tags
+
+    model.deepcopy_changes = True
+    model.setData(index, 'renamed')
+    assert changes[-1] == FieldChange('name', 'item', 'renamed')
+    previous = previous_elements[-1]
+    assert previous.name == 'item'
+    assert previous.tags == element.tags
+    assert previous.tags is not element.tags
+
+
+def test_field_accessors(browser) -> None:
+    model = browser.model
+    elements = [
+        Item('item', '/item'),
+        {'name': 'dict', 'path': '/dict'},
+        ('tuple', '/tuple'),
+        'text',
+    ]
+    indexes = model.append_elements(elements)
+    rows = [[index.siblingAtColumn(c).data() for c in range(2)] for index in indexes]
+    assert rows == [
+        ['item', '/item'],
+        ['dict', '/dict'],
+        ['tuple', '/tuple'],
+        ['text', 'text'],
+    ]
+    assert model._values({'name': 'partial'}) == ['partial', None]
+    assert model._value(elements[0], Field('other')) is None
+
+    # accessors are compiled again for new fields, sequences stay positional
+    model.fields = (Field('path'), Field('name'))
+    assert [model._values(element) for element in elements[:3]] == [
+        ['/item', 'item'],
+        ['/dict', 'dict'],
+        ['tuple', '/tuple'],
+    ]
+
+
+def test_filter_follows_inserted_and_removed_rows(browser) -> None:
+    model = browser.model
+    proxy = browser.proxy
+    rng = random.Random(0)
+    groups = model.append_elements([Item(f'G{i}', f'/{i}') for i in range(4)])
+    for group in groups:
+        children = [Item(rng.choice('xy') * 2, '/') for _ in range(6)]
+        model.append_elements(children, parent=group, no_children=True)
+    browser.filter('x')
+
+    for step in range(100):
+        group = model.index(rng.randrange(model.rowCount()), 0)
+        count = model.rowCount(group)
+        if step % 5 == 0 and count:
+            # rows dropped in the middle shift the following rows
+            row = rng.randrange(count)
+            data = model.mimeData(row_indexes(model, model.index(row, 0, group)))
+            target = model.index(rng.randrange(model.rowCount()), 0)
+            target_row = rng.randrange(model.rowCount(target) + 1)
+            model.dropMimeData(data, QtCore.Qt.MoveAction, target_row, 0, target)
+        elif step % 5 == 1 and count > 1:
+            model.remove_indexes([model.index(rng.randrange(count), 0, group)])
+        elif step % 5 == 2:
+            # groups are copied with their children
+            data = model.mimeData(row_indexes(model, group))
+            target_row = rng.randrange(model.rowCount() + 1)
+            model.dropMimeData(
+                data, QtCore.Qt.MoveAction, target_row, 0, QtCore.QModelIndex()
+            )
+        elif step % 5 == 3 and model.rowCount() > 3:
+            model.remove_indexes([group])
+        else:
+            name = rng.choice('xy') + str(step)
+            model.append_elements([Item(name, '/')], parent=group, no_children=True)
+
+        for row in range(model.rowCount()):
+            group = model.index(row, 0)
+            children = [
+                model.index(child_row, 0, group).data()
+                for child_row in range(model.rowCount(group))
+            ]
+            accepted = [proxy.filterAcceptsRow(i, group) for i in range(len(children))]
+            assert accepted == ['x' in name for name in children], step
+            group_accepted = proxy.filterAcceptsRow(row, QtCore.QModelIndex())
+            assert group_accepted == any(accepted), step
+
+
+def test_accepted_parents_follow_filter_changes(browser) -> None:
+    model = browser.model
+    proxy = browser.proxy
+    parent = model.append_element(Item('Alpha', '/alpha'))
+    for depth in range(20):
+        parent = model.append_element(Item(f'level{depth}', '/'), parent=parent)
+
+    matched = []
+    parent_matches = proxy._parent_matches
+
+    def count_matches(index: QtCore.QModelIndex) -> bool:
+        matched.append(index)
+        return parent_matches(index)
+
+    proxy._parent_matches = count_matches
+
+    def accepted_rows() -> list[bool]:
+        rows = []
+        index = model.index(0, 0, model.index(0, 0))
+        while index.isValid():
+            rows.append(proxy.filterAcceptsRow(index.row(), index.parent()))
+            index = model.index(0, 0, index)
+        return rows
+
+    # each ancestor is evaluated once per filter pass
+    proxy.setFilterFixedString('ALPHA')
+    matched.clear()
+    assert all(accepted_rows())
+    assert len(matched) <= 20
+    matched.clear()
+    assert all(accepted_rows())
+    assert not matched
+
+    # changes of the filter settings start a new pass
+    proxy.setFilterCaseSensitivity(QtCore.Qt.CaseSensitive)
+    assert not any(accepted_rows())
+    proxy.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
+    assert all(accepted_rows())
+    proxy.setFilterRole(QtCore.Qt.ToolTipRole)
+    assert not any(accepted_rows())
+
+
+def test_sort_keys_follow_data_changes(browser) -> None:
+    model = browser.model
+    proxy = browser.proxy
+    model.append_elements(
+        [Item(name, '/') for name in ('b', 'a', 'C')], no_children=True
+    )
+
+    def sorted_names() -> list[str]:
+        proxy.sort(0)
+        return [proxy.index(row, 0).data() for row in range(proxy.rowCount())]
+
+    assert sorted_names() == ['a', 'b', 'C']
+
+    model.setData(model.index(1, 0), 'd')
+    assert sorted_names() == ['b', 'C', 'd']
+
+    proxy.setSortCaseSensitivity(QtCore.Qt.CaseSensitive)
+    assert sorted_names() == ['C', 'b', 'd']
+    proxy.setSortRole(QtCore.Qt.UserRole + 1)
+    proxy.setSortCaseSensitivity(QtCore.Qt.CaseInsensitive)
+    proxy.setSortRole(QtCore.Qt.DisplayRole)
+    assert sorted_names() == ['b', 'C', 'd']
+
+
+def test_widest_values(browser) -> None:
+    model = browser.model
+    group = model.append_element(Item('group', '/a'))
+    items = [Item('a', '/a/bb'), Item('b', '/a/bbb'), Item('c', '/a/bbb')]
+    model.append_elements(items, parent=group, no_children=True)
+
+    values = model.widest_values(Field('path'), 2, rows=2)
+    assert [value for value, indexes in values] == ['/a/bbb', '/a/bb']
+    assert names(model, values[0][1]) == ['b', 'c']
+    assert names(model, values[1][1]) == ['a']
+
+
+def test_resize_columns_matches_contents(browser) -> None:
+    model = browser.model
+    tree = browser.tree
+    group = model.append_element(Item('group', '/group'))
+    subgroup = model.append_element(Item('subgroup', '/group/sub'), parent=group)
+    items = [Item('a' * 40, '/group/sub/' + 'b' * 60), Item('c', '/')]
+    model.append_elements(items, parent=subgroup, no_children=True)
+    browser.show()
+
+    # the widths are estimated without expanding the tree
+    tree.resize_columns()
+    assert not tree.isExpanded(browser.proxy.index(0, 0))
+    widths = [tree.columnWidth(column) for column in range(2)]
+
+    tree.expandAll()
+    assert widths == [tree.sizeHintForColumn(column) for column in range(2)]
+    browser.close()
+
+
+def test_selected_rows_follow_selection_changes(browser) -> None:
+    model = browser.model
+    proxy = browser.proxy
+    tree = browser.tree
+    selection_model = tree.selectionModel()
+    items = [Item(f'item{i}', f'/{i}') for i in range(20)]
+    model.append_elements(items, no_children=True)
+
+    # consecutive rows are selected as one range
+    ranges = []
+    selection_model.selectionChanged.connect(
+        lambda selected, deselected: ranges.append(len(selected))
+    )
+    browser.select_elements(items[2:5] + items[8:10])
+    assert ranges == [2]
+    selected_names = sorted(element.name for element in browser.selected_elements())
+    assert selected_names == ['item2', 'item3', 'item4', 'item8', 'item9']
+
+    def selected_rows() -> list[int]:
+        return sorted(index.row() for index in tree.selected_indexes)
+
+    flags = QtCore.QItemSelectionModel.SelectionFlag
+    rng = random.Random(0)
+    for _ in range(50):
+        row = rng.randrange(20)
+        count = rng.randrange(1, 4)
+        selection = QtCore.QItemSelection(
+            proxy.index(row, 0), proxy.index(min(row + count, 19), 1)
+        )
+        flag = rng.choice((flags.Select, flags.Deselect, flags.Toggle))
+        selection_model.select(selection, flag | flags.Rows)
+        expected = sorted(
+            proxy.mapToSource(index).row() for index in selection_model.selectedRows()
+        )
+        assert selected_rows() == expected
+    assert len(tree._selected_rows) == len(selection_model.selectedRows())
+
+    # rows removed from the model are dropped from the selection
+    browser.select_elements(items[:3])
+    model.remove_indexes([model.index(1, 0)])
+    selected_names = sorted(element.name for element in browser.selected_elements())
+    assert selected_names == ['item0', 'item2']
+    assert selected_rows() == [0, 1]
@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+import os
+import time
+
+import pytest
+from qtpy import QtCore
+
+from qt_extensions.elementbrowser import Field
+from qt_extensions.filebrowser import (
+    CopyJob,
+    FileBrowser,
+    MoveJob,
+    RemoveJob,
+    ScanJob,
+    TreeCache,
+    ValidateJob,
+)
+
+
+@pytest.fixture
+def root(tmp_path) -> str:
+    for path in ('a/c', 'b'):
+        os.makedirs(tmp_path / path)
+    for path in ('x.txt', 'a/y.txt', 'a/c/z.txt', 'b/w.txt'):
+        (tmp_path / path).write_text('text')
+    return str(tmp_path)
+
+
+def create_browser(
+    root: str, fields: tuple[Field, ...] = (Field('name'), Field('path')), **attributes
+) -> FileBrowser:
+    class Browser(FileBrowser):
+        pass
+
+    for name, value in attributes.items():
+        setattr(Browser, name, value)
+    return Browser(root, fields)
+
+
+def model_paths(model, parent=QtCore.QModelIndex()) -> set[str]:
+    paths = set()
+    for row in range(model.rowCount(parent)):
+        index = model.index(row, 0, parent)
+        paths.add(model.element(index).path)
+        paths.update(model_paths(model, index))
+    return paths
+
+
+def disk_paths(root: str) -> set[str]:
+    return {
+        os.path.join(path, name)
+        for path, dir_names, file_names in os.walk(root)
+        for name in dir_names + file_names
+    }
+
+
+def scan(root: str) -> dict[str, tuple[int, list[str], list[str]]]:
+    entries = {}
+
+    def entries_found(path, dir_entries, file_entries) -> None:
+        entries[path] = (
+            [entry.name for entry in dir_entries],
+            [entry.name for entry in file_entries],
+        )
+
+    job = ScanJob(root)
+    job.entries_found.connect(entries_found)
+    job.run()
+    return {path: (job.mtimes[path], *names) for path, names in entries.items()}
+
+
+def cached_dirs(dirs: dict) -> dict[str, tuple[int, list[str]]]:
+    return {
+        path: (mtime_ns, [os.path.join(path, name) for name in dir_names])
+        for path, (mtime_ns, dir_names, file_names) in dirs.items()
+    }
+
+
+def wait_for_jobs(qapp, browser: FileBrowser, timeout: float = 5) -> None:
+    # queued signals of the jobs are delivered by the event loop
+    deadline = time.monotonic() + timeout
+    while browser.jobs():
+        assert time.monotonic() < deadline
+        qapp.processEvents()
+        time.sleep(0.01)
+    QtCore.QThreadPool.globalInstance().waitForDone()
+    qapp.processEvents()
+
+
+def test_lazy_loading(qapp, root) -> None:
+    browser = create_browser(root, lazy_loading=True)
+    model = browser.model
+    assert model_paths(model) == {
+        os.path.join(root, name) for name in ('a', 'b', 'x.txt')
+    }
+
+    # directories are scanned when they are expanded
+    index = model.find_indexes(os.path.join(root, 'a'), Field('path'))[0]
+    assert model.canFetchMore(index)
+    assert model.hasChildren(index)
+    assert model.rowCount(index) == 0
+
+    browser.show()
+    browser.tree.expand(browser.proxy.mapFromSource(index))
+    assert not model.canFetchMore(index)
+    assert model_paths(model, index) == {
+        os.path.join(root, 'a', 'c'),
+        os.path.join(root, 'a', 'y.txt'),
+    }
+    index = model.find_indexes(os.path.join(root, 'a', 'c'), Field('path'))[0]
+    assert model.canFetchMore(index)
+
+    browser.refresh()
+    assert len(model_paths(model)) == 3
+    browser.close()
+
+
+def test_tree_matches_disk(qapp, root) -> None:
+    os.symlink(os.path.join(root, 'a'), os.path.join(root, 'link'))
+    open(os.path.join(root, 'a', 'c', 'image.png'), 'w').close()
+
+    browser = create_browser(root)
+    # like os.walk, symlinks to directories are listed but not followed
+    assert model_paths(browser.model) == disk_paths(root)
+
+    browser = create_browser(root, file_filter='.png')
+    assert model_paths(browser.model) == {
+        os.path.join(root, path) for path in ('a', 'a/c', 'a/c/image.png', 'b', 'link')
+    }
+
+
+def test_background_io(qapp, root) -> None:
+    for i in range(50):
+        os.makedirs(os.path.join(root, 'b', f'dir{i}'))
+        open(os.path.join(root, 'b', f'dir{i}', 'file.txt'), 'w').close()
+
+    browser = create_browser(root, background_io=True)
+    wait_for_jobs(qapp, browser)
+    assert model_paths(browser.model) == disk_paths(root)
+
+    # file operations run on the thread pool too
+    started = []
+    failed = []
+
+    def job_started(job) -> None:
+        started.append(job)
+        job.failed.connect(lambda source, error: failed.append(source))
+
+    browser.job_started.connect(job_started)
+    job = browser.copy_paths(
+        [
+            (os.path.join(root, 'x.txt'), os.path.join(root, 'a', 'x.txt')),
+            (os.path.join(root, 'missing.txt'), os.path.join(root, 'a', 'z.txt')),
+        ]
+    )
+    wait_for_jobs(qapp, browser)
+    assert started == [job]
+    assert failed == [os.path.join(root, 'missing.txt')]
+    assert model_paths(browser.model) == disk_paths(root)
+
+
+def test_sync_dir(qapp, root) -> None:
+    browser = create_browser(root)
+    model = browser.model
+    browser.show()
+
+    # unchanged rows keep their index, selection and expanded state
+    dir_path = os.path.join(root, 'a')
+    index = model.find_indexes(dir_path, Field('path'))[0]
+    unchanged = QtCore.QPersistentModelIndex(
+        model.find_indexes(os.path.join(dir_path, 'c'), Field('path'))[0]
+    )
+    browser.tree.expand(browser.proxy.mapFromSource(index))
+    browser.select_elements([model.element(unchanged.sibling(unchanged.row(), 0))])
+
+    os.remove(os.path.join(dir_path, 'y.txt'))
+    open(os.path.join(dir_path, 'new.txt'), 'w').close()
+    removed = []
+    model.rowsAboutToBeRemoved.connect(lambda *args: removed.append(args))
+    browser.sync_dir(dir_path)
+
+    assert len(removed) == 1
+    assert model_paths(model) == disk_paths(root)
+    assert unchanged.isValid()
+    assert [element.path for element in browser.selected_elements()] == [
+        os.path.join(dir_path, 'c')
+    ]
+    assert browser.tree.isExpanded(browser.proxy.mapFromSource(index))
+
+    # renamed rows are updated in place
+    model.setData(unchanged.sibling(unchanged.row(), 0), 'd')
+    assert os.path.isdir(os.path.join(dir_path, 'd'))
+    assert unchanged.isValid()
+    assert model.element(unchanged.sibling(unchanged.row(), 0)).path == os.path.join(
+        dir_path, 'd'
+    )
+    assert model_paths(model) == disk_paths(root)
+    browser.close()
+
+
+def test_watch_files(qapp, root) -> None:
+    browser = create_browser(root, watch_files=True)
+    open(os.path.join(root, 'b', 'new.txt'), 'w').close()
+    os.remove(os.path.join(root, 'a', 'c', 'z.txt'))
+
+    deadline = time.monotonic() + 5
+    while model_paths(browser.model) != disk_paths(root):
+        assert time.monotonic() < deadline
+        qapp.processEvents()
+        time.sleep(0.01)
+    browser.close()
+
+
+def test_batched_file_jobs(qapp, root) -> None:
+    browser = create_browser(root)
+    model = browser.model
+    started = []
+    browser.job_started.connect(started.append)
+    inserted = []
+    model.rowsInserted.connect(
+        lambda parent, first, last: inserted.append(
+            model.element(parent).path if parent.isValid() else root
+        )
+    )
+    reset = []
+    model.modelReset.connect(lambda: reset.append(True))
+
+    # one job for the whole selection and one insertion per directory
+    paths = [
+        os.path.join(root, path) for path in ('x.txt', 'a/y.txt', 'a/c', 'b/w.txt')
+    ]
+    browser.select_elements(
+        [model.element(model.find_indexes(path, Field('path'))[0]) for path in paths]
+    )
+    copies = [model.element(index).path for index in browser.duplicate_selected()]
+    assert len(copies) == 4
+    assert [type(job) for job in started] == [CopyJob]
+    # directories and files are appended in one batch each
+    assert sorted(inserted) == sorted(
+        [
+            root,
+            os.path.join(root, 'a'),
+            os.path.join(root, 'a'),
+            os.path.join(root, 'a', 'c1'),
+            os.path.join(root, 'b'),
+        ]
+    )
+    assert model_paths(model) == disk_paths(root)
+
+    started.clear()
+    browser.move_paths(
+        [
+            (os.path.join(root, 'a', 'y.txt'), os.path.join(root, 'b', 'y.txt')),
+            (os.path.join(root, 'x.txt'), os.path.join(root, 'b', 'x.txt')),
+        ]
+    )
+    assert [type(job) for job in started] == [MoveJob]
+    assert model_paths(model) == disk_paths(root)
+
+    started.clear()
+    browser.select_elements(
+        [model.element(model.find_indexes(path, Field('path'))[0]) for path in copies]
+    )
+    browser.remove_selected()
+    assert [type(job) for job in started] == [RemoveJob]
+    assert not any(os.path.exists(path) for path in copies)
+    assert model_paths(model) == disk_paths(root)
+    assert not reset
+
+
+def test_info_fields(qapp, root) -> None:
+    for i in range(500):
+        open(os.path.join(root, f'file{i:03}.txt'), 'w').close()
+
+    fields = (Field('name'), Field('path'), Field('size'), Field('modified'))
+    browser = create_browser(root, fields)
+    model = browser.model
+    browser.resize(400, 300)
+    browser.show()
+    qapp.processEvents()
+
+    # metadata is only read for the rows that are painted
+    elements = [model.element(model.index(row, 0)) for row in range(model.rowCount())]
+    read = [element for element in elements if element.info is not None]
+    assert 0 < len(read) < 100
+
+    index = model.find_indexes(os.path.join(root, 'a', 'y.txt'), Field('path'))[0]
+    assert model.element(index).info is None
+    assert index.siblingAtColumn(2).data() == 4
+
+    # changed files are refreshed when their directory is synced
+    changed = []
+    model.dataChanged.connect(lambda top_left, *args: changed.append(top_left.row()))
+    with open(os.path.join(root, 'a', 'y.txt'), 'w') as f:
+        f.write('more text')
+    stat_result = os.stat(os.path.join(root, 'a', 'y.txt'))
+    os.utime(
+        os.path.join(root, 'a', 'y.txt'),
+        ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 10**9),
+    )
+    browser.sync_dir(os.path.join(root, 'a'))
+    assert changed == [index.row()]
+    assert index.siblingAtColumn(2).data() == 9
+    browser.close()
+
+
+def test_tree_cache_round_trip(qapp, root, tmp_path) -> None:
+    cache = TreeCache(str(tmp_path / 'cache.db'))
+    dirs = scan(root)
+    assert dirs[os.path.join(root, 'a')][1:] == (['c'], ['y.txt'])
+
+    cache.save(root, dirs)
+    assert cache.load(root) == dirs
+    assert cache.load(os.path.join(root, 'a')) == {}
+
+    # a later save replaces the tree
+    del dirs[os.path.join(root, 'b')]
+    cache.save_later(root, dirs)
+    TreeCache.save_pool().waitForDone()
+    assert cache.load(root) == dirs
+
+
+def test_validate_job_scans_changed_dirs(qapp, root, tmp_path) -> None:
+    dirs = scan(root)
+
+    job = ValidateJob(root, cached_dirs(dirs))
+    job.run()
+    assert job.changed_paths == []
+    assert job.mtimes == {path: mtime_ns for path, (mtime_ns, *_) in dirs.items()}
+
+    found = []
+    os.makedirs(os.path.join(root, 'a', 'd'))
+    job = ValidateJob(root, cached_dirs(dirs))
+    job.entries_found.connect(lambda path, *entries: found.append(path))
+    job.run()
+    # new directories are not cached and are scanned too
+    changed = [os.path.join(root, 'a'), os.path.join(root, 'a', 'd')]
+    assert job.changed_paths == changed
+    assert found == changed
+
+
+def test_cached_tree(qapp, root, tmp_path) -> None:
+    cache_path = str(tmp_path / 'cache.db')
+    root = os.path.join(root, 'a')
+    create_browser(root, cache_path=cache_path)
+    TreeCache.save_pool().waitForDone()
+    assert set(TreeCache(cache_path).load(root)) == {root, os.path.join(root, 'c')}
+
+    # the cached tree is shown and then validated against the disk
+    open(os.path.join(root, 'c', 'new.txt'), 'w').close()
+    browser = create_browser(root, cache_path=cache_path)
+    assert [type(job) for job in browser.jobs()] == [ValidateJob]
+    assert model_paths(browser.model) == disk_paths(root) - {
+        os.path.join(root, 'c', 'new.txt')
+    }
+    wait_for_jobs(qapp, browser)
+    assert model_paths(browser.model) == disk_paths(root)
+    TreeCache.save_pool().waitForDone()
+    assert 'new.txt' in TreeCache(cache_path).load(root)[os.path.join(root, 'c')][2]
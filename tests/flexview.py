@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import itertools
+import random
+
+import pytest
+from qtpy import QtCore, QtGui, QtWidgets
+
+from qt_extensions.flexview import FlexView
+
+
+def size_model(count: int, seed: int = 0) -> QtGui.QStandardItemModel:
+    rng = random.Random(seed)
+    model = QtGui.QStandardItemModel()
+    for _ in range(count):
+        item = QtGui.QStandardItem('item')
+        size = QtCore.QSize(rng.randint(20, 200), rng.randint(20, 90))
+        item.setData(size, QtCore.Qt.SizeHintRole)
+        model.appendRow(item)
+    return model
+
+
+def names(indexes) -> list[str]:
+    return [index.data() for index in indexes]
+
+
+def test_indexes_follow_model_changes(qapp) -> None:
+    model = QtGui.QStandardItemModel()
+    view = FlexView()
+    view.setModel(model)
+    view.resize(800, 600)
+    view.show()
+
+    def assert_synced() -> None:
+        assert names(view._indexes()) == names(view._collect_indexes(view.rootIndex()))
+
+    for i in range(5):
+        model.appendRow(QtGui.QStandardItem(f'item{i}'))
+    model.item(2).appendRows([QtGui.QStandardItem(f'child{i}') for i in range(2)])
+    model.insertRow(0, QtGui.QStandardItem('new'))
+    assert_synced()
+
+    model.item(3).child(0).appendRow(QtGui.QStandardItem('grandchild'))
+    model.removeRow(1)
+    assert_synced()
+
+    model.moveRow(QtCore.QModelIndex(), 0, QtCore.QModelIndex(), 4)
+    assert_synced()
+    model.moveRow(QtCore.QModelIndex(), 1, model.index(3, 0), 0)
+    assert_synced()
+    view.close()
+
+
+def test_item_sizes_follow_size_hints(qapp) -> None:
+    model = size_model(20)
+    view = FlexView()
+    view.uniform_item_sizes = False
+    view.setModel(model)
+    view.resize(440, 340)
+    view.show()
+    qapp.processEvents()
+
+    def assert_sizes() -> None:
+        rects = [view.visualRect(model.index(row, 0)) for row in range(20)]
+        hints = [model.item(row).data(QtCore.Qt.SizeHintRole) for row in range(20)]
+        assert [rect.width() for rect in rects] == [hint.width() for hint in hints]
+        # items are stretched to the tallest item of their line
+        for y in {rect.y() for rect in rects}:
+            line = [(rect, hint) for rect, hint in zip(rects, hints) if rect.y() == y]
+            height = max(hint.height() for rect, hint in line)
+            assert {rect.height() for rect, hint in line} == {height}
+
+    assert_sizes()
+    model.item(3).setData(QtCore.QSize(300, 120), QtCore.Qt.SizeHintRole)
+    qapp.processEvents()
+    assert_sizes()
+    view.close()
+
+
+@pytest.mark.parametrize(
+    'direction, wrap, uniform, grow',
+    itertools.product(
+        FlexView.LayoutFlags, FlexView.WrapFlags, (True, False), (True, False)
+    ),
+)
+def test_positions_in_rect(qapp, direction, wrap, uniform, grow) -> None:
+    model = size_model(97)
+    view = FlexView()
+    view.default_size = QtCore.QSize(91, 61)
+    view.uniform_item_sizes = uniform
+    view.flex_direction = direction
+    view.wrap = wrap
+    view.grow = grow
+    view.setModel(model)
+    view.resize(703, 497)
+    view.show()
+    qapp.processEvents()
+
+    # the search must return the same items as checking every item rect
+    item_rects = {position: view._item_rect(position) for position in range(97)}
+    rng = random.Random(1)
+    for _ in range(200):
+        rect = QtCore.QRect(
+            rng.randint(-10, view.min_item_width),
+            rng.randint(-10, view.height),
+            rng.randint(1, 400),
+            rng.randint(1, 400),
+        )
+        expected = [
+            p for p, item_rect in item_rects.items() if item_rect.intersects(rect)
+        ]
+        assert sorted(view._positions_in_rect(rect)) == expected, rect
+    view.close()
+
+
+@pytest.mark.parametrize('direction', FlexView.LayoutFlags)
+def test_move_cursor_along_grid(qapp, direction) -> None:
+    model = QtGui.QStandardItemModel()
+    for i in range(100):
+        model.appendRow(QtGui.QStandardItem(str(i)))
+    view = FlexView()
+    view.default_size = QtCore.QSize(100, 60)
+    view.flex_direction = direction
+    view.setModel(model)
+    view.resize(440, 340)
+    view.show()
+    qapp.processEvents()
+
+    cursor_action = QtWidgets.QAbstractItemView.CursorAction
+    view.setCurrentIndex(model.index(45, 0))
+    current_rect = view.visualRect(view.currentIndex())
+
+    def offset(action) -> tuple[int, int]:
+        rect = view.visualRect(view.moveCursor(action, QtCore.Qt.NoModifier))
+        return rect.x() - current_rect.x(), rect.y() - current_rect.y()
+
+    # arrows move to the adjacent item on screen whatever the direction
+    assert offset(cursor_action.MoveLeft) == (-104, 0)
+    assert offset(cursor_action.MoveRight) == (104, 0)
+    assert offset(cursor_action.MoveUp) == (0, -64)
+    assert offset(cursor_action.MoveDown) == (0, 64)
+
+    # pages move by about the viewport size along the cross axis
+    viewport = view.viewport().size()
+    for action, sign in (
+        (cursor_action.MovePageUp, -1),
+        (cursor_action.MovePageDown, 1),
+    ):
+        x, y = offset(action)
+        if view._is_column():
+            page, line, moved, other = viewport.width(), 104, x, y
+        else:
+            page, line, moved, other = viewport.height(), 64, y, x
+        assert other == 0
+        assert page - line < sign * moved <= page + line
+    view.close()
+
+
+def test_cached_appearance(qapp) -> None:
+    model = QtGui.QStandardItemModel()
+    for i in range(12):
+        model.appendRow(
+            QtGui.QStandardItem(f'item {i} with a long name' if i % 2 else '')
+        )
+
+    images = []
+    for cached in (False, True):
+        view = FlexView()
+        view.default_size = QtCore.QSize(100, 60)
+        view.itemDelegate().cached_appearance = cached
+        view.setModel(model)
+        view.resize(440, 340)
+        view.selectionModel().select(
+            model.index(1, 0), QtCore.QItemSelectionModel.SelectionFlag.Select
+        )
+        view.show()
+        qapp.processEvents()
+        images.append(view.viewport().grab().toImage())
+        if not cached:
+            view.close()
+
+    # one frame per state and one elided text per item text
+    delegate = view.itemDelegate()
+    assert len(delegate._frame_pixmaps) == 2
+    assert len(delegate._elided_texts) == 7
+
+    # tiles without text only show the frame, which is blitted unchanged
+    rect = view.visualRect(model.index(0, 0))
+    assert images[0].copy(rect) == images[1].copy(rect)
+
+    # repainting reuses the cache
+    assert view.viewport().grab().toImage() == images[1]
+    assert len(delegate._frame_pixmaps) == 2
+    assert len(delegate._elided_texts) == 7
+    view.close()
+
+
+def test_lazy_child_rows_fetch_visible_rows(qapp) -> None:
+    model = QtGui.QStandardItemModel()
+    for group in range(50):
+        item = QtGui.QStandardItem(f'group{group}')
+        item.appendRows([QtGui.QStandardItem(f'child{i}') for i in range(10)])
+        model.appendRow(item)
+
+    view = FlexView()
+    view.lazy_child_rows = True
+    view.default_size = QtCore.QSize(100, 60)
+    view.resize(440, 340)
+    view.setModel(model)
+    view.show()
+    for _ in range(20):
+        qapp.processEvents()
+
+    # only the children of groups near the viewport are loaded
+    visible = list(view._positions_in_rect(view.viewport().rect()))
+    loaded = len(view._indexes())
+    assert visible
+    assert loaded < 550 / 2
+
+    view.verticalScrollBar().setValue(view.verticalScrollBar().maximum())
+    for _ in range(20):
+        qapp.processEvents()
+    assert len(view._indexes()) > loaded
+    assert names(view._indexes()) == names(view._collect_indexes(view.rootIndex()))
+    view.close()
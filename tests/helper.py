@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import os
+
+from qt_extensions.helper import NameAllocator, PathAllocator, unique_name
+
+
+def test_unique_name() -> None:
+    assert unique_name('file', []) == 'file'
+    assert unique_name('file', ['File']) == 'file1'
+    assert unique_name('file', ['file', 'file1', 'file3']) == 'file2'
+    assert unique_name('file9', ['file9']) == 'file10'
+
+
+def test_name_allocator() -> None:
+    allocator = NameAllocator(['file', 'file2'])
+    names = [allocator.allocate('file') for _ in range(3)]
+    assert names == ['file1', 'file3', 'file4']
+    assert allocator.allocate('other') == 'other'
+    assert allocator.allocate('OTHER') == 'OTHER1'
+
+
+def test_path_allocator(tmp_path) -> None:
+    for name in ('image.png', 'image1.png', 'image.jpg'):
+        (tmp_path / name).touch()
+
+    allocator = PathAllocator()
+    path = os.path.join(tmp_path, 'image.png')
+    assert allocator.allocate(path) == os.path.join(tmp_path, 'image2.png')
+    assert allocator.allocate(path) == os.path.join(tmp_path, 'image3.png')
+    path = os.path.join(tmp_path, 'image.jpg')
+    assert allocator.allocate(path) == os.path.join(tmp_path, 'image1.jpg')
@@ -9,7 +9,13 @@ def main() -> None:
     with application():
         widget = FileBrowser(
             os.path.dirname(__file__),
-            [Field('name'), Field('path')]
+            [
+                Field('name'),
+                Field('path'),
+                Field('size'),
+                Field('modified'),
+                Field('type'),
+            ],
         )
         widget.show()
 